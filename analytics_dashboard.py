@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Analytics Dashboard for Doctor Appointment Bot
+Generates daily statistics, weekly reports, and visualizations from the
+appointment data stored in Google Sheets
+"""
+
+import io
+import os
+import sys
+import time
+import functools
+from datetime import datetime, timedelta
+
+# orjson parses the service-account blob a few times faster than the
+# stdlib; fall back silently when it is not installed
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+import numpy as np
+import pandas as pd
+import matplotlib
+# Headless rendering: skip GUI backend initialization on servers
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import gspread
+from google.oauth2.service_account import Credentials
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Column layout written by GoogleSheetsStorage.setup_headers
+SHEET_COLUMNS = (
+    'Timestamp', 'Appointment ID', 'Status', 'Doctor ID', 'Doctor Name',
+    'Specialization', 'Consultation Fee', 'Patient Name', 'Age', 'Gender',
+    'Number', 'Email-ID', 'Chief Complaint', 'Preferred Date',
+    'Preferred Time', 'Additional Notes',
+)
+
+# Clean chart style (the handful of seaborn-v0_8 keys we actually use,
+# without paying the seaborn import cost)
+plt.rcParams.update({
+    'axes.grid': True,
+    'grid.alpha': 0.3,
+    'axes.facecolor': '#EAEAF2',
+    'figure.facecolor': 'white',
+    'axes.axisbelow': True,
+})
+
+
+@functools.lru_cache(maxsize=4)
+def _open_worksheet(sheet_id, creds_key, creds_is_json):
+    """Authorize gspread and open the Appointments worksheet, cached.
+
+    The JWT sign + token exchange behind gspread.authorize costs a network
+    round-trip; caching per (sheet, credentials) makes re-instantiating
+    AnalyticsDashboard essentially free.
+    """
+    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+    if creds_is_json:
+        creds = Credentials.from_service_account_info(_json.loads(creds_key), scopes=scope)
+    else:
+        creds = Credentials.from_service_account_file(creds_key, scopes=scope)
+    client = gspread.authorize(creds)
+    return client, client.open_by_key(sheet_id).worksheet('Appointments')
+
+
+def _top(series):
+    """Most frequent value of a Series, or 'N/A' when it is empty.
+
+    value_counts().index[0] is a single hash pass plus an argmax, unlike
+    mode() which sorts — and the old ternaries evaluated mode() twice.
+    """
+    vc = series.value_counts()
+    return vc.index[0] if len(vc) and vc.iloc[0] > 0 else 'N/A'
+
+
+def _daily_counts(timestamps):
+    """Per-day appointment counts via an integer bincount.
+
+    Bucketing on datetime64[D] integer codes avoids materializing a Python
+    date object per row the way groupby(...dt.date) does.
+    """
+    days = timestamps.dropna().values.astype('datetime64[D]').view('i8')
+    if days.size == 0:
+        return pd.Series(dtype='int64')
+    base = days.min()
+    counts = np.bincount(days - base)
+    index = pd.DatetimeIndex((np.arange(counts.size) + base).astype('datetime64[D]'))
+    nonzero = counts > 0
+    return pd.Series(counts[nonzero], index=index[nonzero])
+
+
+class AnalyticsDashboard:
+    """Generates analytics reports from the appointment sheet"""
+
+    # Returned on the empty/error paths so callers always see the right
+    # columns and dtypes without re-running any conversions
+    _EMPTY_DF = pd.DataFrame({
+        col: pd.Series(dtype='datetime64[ns]' if col in ('Timestamp', 'Preferred Date')
+                       else 'object')
+        for col in SHEET_COLUMNS
+    })
+
+    def __init__(self):
+        self.sheet_id = os.getenv('GOOGLE_SHEETS_ID')
+
+        # Try to get credentials from environment variable first (for Railway)
+        google_creds = os.getenv('GOOGLE_CREDENTIALS')
+        if google_creds:
+            self.client, self.worksheet = _open_worksheet(self.sheet_id, google_creds, True)
+        else:
+            # Fallback to file (for local development)
+            creds_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
+            self.client, self.worksheet = _open_worksheet(self.sheet_id, creds_file, False)
+
+        # Short-lived DataFrame cache so back-to-back reports share one fetch
+        self._cache = None
+        self._cache_ts = 0
+        self._cache_ttl = 60
+
+        # Local Parquet mirror: warm starts load from disk and only the
+        # rows appended since the last sync are fetched from Sheets
+        self._parquet_path = 'appointments.parquet'
+        self._mirror = None
+        self._last_row = 1  # header row
+        if os.path.exists(self._parquet_path):
+            try:
+                self._mirror = pd.read_parquet(self._parquet_path)
+                self._last_row = len(self._mirror) + 1
+            except Exception as e:
+                print(f"⚠️ Could not load local appointment mirror: {e}")
+
+        # Figure is created lazily on first render and reused afterwards
+        self._fig = None
+        self._axes = None
+
+    def refresh(self):
+        """Drop the cached DataFrame so the next call re-fetches from Sheets."""
+        self._cache = None
+        self._cache_ts = 0
+
+    def _to_dataframe(self, rows, columns):
+        """Build the typed appointment DataFrame from raw sheet values."""
+        if not rows:
+            return self._EMPTY_DF
+        df = pd.DataFrame(rows)
+        df = df.reindex(columns=range(len(columns)))
+        df.columns = columns
+        # Explicit formats keep pandas on the vectorized C parser
+        # instead of falling back to dateutil per element
+        df['Timestamp'] = pd.to_datetime(
+            df['Timestamp'], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+        df['Preferred Date'] = pd.to_datetime(
+            df['Preferred Date'], format='%Y-%m-%d', errors='coerce')
+        # Low-cardinality columns as category: downstream
+        # value_counts/mode run on small integer codes instead of
+        # hashing Python strings
+        for col in ('Doctor Name', 'Specialization', 'Preferred Time',
+                    'Chief Complaint', 'Age'):
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df
+
+    def get_appointment_data(self):
+        """Fetch all appointment data as a DataFrame (cached for a short TTL)."""
+        if self._cache is not None and time.time() - self._cache_ts < self._cache_ttl:
+            return self._cache
+
+        try:
+            if self._mirror is None:
+                # First sync: single values fetch; building the DataFrame
+                # straight from the 2-D list avoids gspread's per-row dict
+                # construction
+                raw = self.worksheet.get_all_values()
+                df = self._to_dataframe(raw[1:], raw[0]) if len(raw) > 1 else self._EMPTY_DF
+                new_rows = not df.empty
+            else:
+                # Incremental sync: only rows appended since the last fetch
+                appended = self.worksheet.get(f'A{self._last_row + 1}:P')
+                new_rows = bool(appended)
+                if new_rows:
+                    columns = list(self._mirror.columns)
+                    df = pd.concat(
+                        [self._mirror, self._to_dataframe(appended, columns)],
+                        ignore_index=True)
+                    # concat widens category dtypes to object; restore them
+                    for col in ('Doctor Name', 'Specialization', 'Preferred Time',
+                                'Chief Complaint', 'Age'):
+                        if col in df.columns:
+                            df[col] = df[col].astype('category')
+                else:
+                    df = self._mirror
+
+            self._mirror = df
+            self._last_row = len(df) + 1
+            if new_rows:
+                try:
+                    df.to_parquet(self._parquet_path, compression='zstd')
+                except Exception as e:
+                    print(f"⚠️ Could not update local appointment mirror: {e}")
+
+            self._cache = df
+            self._cache_ts = time.time()
+            return df
+        except Exception as e:
+            print(f"❌ Error fetching appointment data: {e}")
+            return self._EMPTY_DF
+
+    def _fetch_recent_rows(self, since):
+        """Fetch only the trailing rows whose Timestamp is newer than `since`.
+
+        Rows are appended in booking order, so the recent window is a suffix
+        of the sheet; reading a bounded tail range keeps the transfer
+        proportional to the window instead of the full history.
+        """
+        try:
+            header = self.worksheet.row_values(1)
+            last_row = self.worksheet.row_count
+            window = 200
+            while True:
+                start = max(2, last_row - window + 1)
+                rows = self.worksheet.get(f'A{start}:P{last_row}')
+                df = self._to_dataframe(rows, header)
+                # The window is truly everything only once it spans the
+                # whole sheet; row_count is the grid size, not the last
+                # data row, so an empty window may just be trailing blank
+                # cells and has to widen like any other short read
+                if start == 2:
+                    return df
+                if not df.empty and df['Timestamp'].min() < since:
+                    return df
+                window *= 2
+        except Exception as e:
+            print(f"❌ Error fetching recent appointment data: {e}")
+            return self._EMPTY_DF
+
+    def generate_daily_stats(self, df=None):
+        """Generate a daily statistics summary."""
+        if df is None:
+            df = self.get_appointment_data()
+
+        if df.empty:
+            return "📊 No appointment data available yet."
+
+        today = datetime.now().date()
+
+        daily_appointments = _daily_counts(df['Timestamp'])
+        today_count = daily_appointments.get(pd.Timestamp(today), 0)
+
+        # One melt + groupby pass covers all three categorical counts
+        cat_counts = (
+            df[['Doctor Name', 'Specialization', 'Preferred Time']]
+            .melt()
+            .groupby(['variable', 'value'])
+            .size()
+        )
+        doctor_counts = cat_counts['Doctor Name'].sort_values(ascending=False)
+        specialty_counts = cat_counts['Specialization'].sort_values(ascending=False)
+        time_counts = cat_counts['Preferred Time'].sort_values(ascending=False)
+
+        stats = f"""
+📊 **DAILY ANALYTICS REPORT**
+📅 Date: {today.strftime('%Y-%m-%d')}
+
+📈 **Overall Statistics:**
+• Total Appointments: {len(df)}
+• Today's Appointments: {today_count}
+• Average per Day: {daily_appointments.mean():.1f}
+
+👨‍⚕️ **Most Popular Doctor:**
+• {doctor_counts.index[0] if len(doctor_counts) else 'N/A'} ({doctor_counts.iloc[0] if len(doctor_counts) else 0} bookings)
+
+🏥 **Most Requested Specialization:**
+• {specialty_counts.index[0] if len(specialty_counts) else 'N/A'} ({specialty_counts.iloc[0] if len(specialty_counts) else 0} bookings)
+
+🕐 **Most Popular Time Slot:**
+• {time_counts.index[0] if len(time_counts) else 'N/A'} ({time_counts.iloc[0] if len(time_counts) else 0} bookings)
+"""
+        return stats
+
+    def create_visualizations(self, df=None):
+        """Create and save dashboard charts."""
+        if df is None:
+            df = self.get_appointment_data()
+
+        if df.empty:
+            print("📊 No data available for visualizations")
+            return None
+
+        # Reuse one figure across renders; clearing axes is much cheaper
+        # than re-running the backend/font warm-up of a fresh subplots call
+        if self._fig is None:
+            self._fig, self._axes = plt.subplots(2, 2, figsize=(15, 12))
+        fig, axes = self._fig, self._axes
+        for ax in axes.flat:
+            ax.clear()
+        fig.suptitle('Doctor Appointment Analytics Dashboard', fontsize=16, fontweight='bold')
+
+        doctor_counts = df['Doctor Name'].value_counts()
+        specialty_counts = df['Specialization'].value_counts()
+        time_counts = df['Preferred Time'].value_counts().sort_index()
+        daily_counts = _daily_counts(df['Timestamp'])
+
+        # One dispatch loop through pandas' plotting accessor instead of
+        # four hand-rolled matplotlib blocks; the pie stays a special case
+        panels = (
+            (axes[0, 0], doctor_counts, 'bar', 'Appointments by Doctor', 'steelblue'),
+            (axes[1, 0], time_counts, 'bar', 'Popular Time Slots', 'mediumseagreen'),
+            (axes[1, 1], daily_counts, 'line', 'Daily Booking Trend', 'indianred'),
+        )
+        for ax, series, kind, title, color in panels:
+            extra = {'marker': 'o'} if kind == 'line' else {}
+            series.plot(kind=kind, ax=ax, color=color, rot=45, **extra)
+            ax.set_title(title)
+            ax.set_xlabel('')
+            for patch in ax.patches:
+                patch.set_rasterized(True)
+
+        # Specialization distribution; precomputed labels avoid the
+        # per-wedge autopct callback and its extra text layout pass
+        pct = specialty_counts / specialty_counts.sum() * 100
+        labels = [f'{name}\n{p:.1f}%' for name, p in zip(specialty_counts.index, pct)]
+        wedges, *_ = axes[0, 1].pie(specialty_counts.values, labels=labels)
+        for wedge in wedges:
+            wedge.set_rasterized(True)
+        axes[0, 1].set_title('Specialization Distribution')
+
+        fig.tight_layout()
+        # Rasterized artists + vector text: labels stay crisp while the
+        # chart bodies stay small at a moderate dpi. tight_layout already
+        # ran, so skip the second layout pass bbox_inches='tight' would do
+        fig.savefig('analytics_dashboard.pdf', dpi=150)
+        if sys.stdout.isatty():
+            plt.show()
+
+        print("✅ Dashboard saved as analytics_dashboard.pdf")
+        return fig
+
+    def generate_weekly_report(self, df=None):
+        """Generate a report covering the last 7 days."""
+        one_week_ago = datetime.now() - timedelta(days=7)
+
+        if df is None:
+            # Reuse a fresh cache if we have one; otherwise fetch only the
+            # recent tail of the sheet instead of the full history
+            if self._cache is not None and time.time() - self._cache_ts < self._cache_ttl:
+                df = self._cache
+            else:
+                df = self._fetch_recent_rows(one_week_ago)
+
+        if df.empty:
+            return "📊 No appointment data available for weekly report."
+
+        weekly_data = df[df['Timestamp'] >= one_week_ago]
+
+        if weekly_data.empty:
+            return "📊 No appointments in the last 7 days."
+
+        # (day, doctor) bucketing as one flat bincount over factorized
+        # codes — no per-row Python date objects, no general groupby
+        day_codes, day_index = pd.factorize(
+            weekly_data['Timestamp'].values.astype('datetime64[D]'), sort=True)
+        doc_codes, doc_index = pd.factorize(weekly_data['Doctor Name'])
+        grid = np.bincount(
+            day_codes * len(doc_index) + doc_codes,
+            minlength=len(day_index) * len(doc_index),
+        ).reshape(len(day_index), len(doc_index))
+
+        # Compute each metric once into a local, then stream the report
+        # into a buffer instead of one giant f-string holding live Series
+        top_doctor = _top(weekly_data['Doctor Name'])
+        top_time = _top(weekly_data['Preferred Time'])
+        top_complaint = _top(weekly_data['Chief Complaint'])
+
+        buf = io.StringIO()
+        w = buf.write
+        w("\n📊 **WEEKLY ANALYTICS REPORT**\n")
+        w(f"📅 Week ending: {datetime.now().strftime('%Y-%m-%d')}\n\n")
+        w("📈 **This Week's Summary:**\n")
+        w(f"• Total Appointments: {len(weekly_data)}\n")
+        w(f"• Busiest Doctor: {top_doctor}\n")
+        w(f"• Most Popular Time: {top_time}\n")
+        w(f"• Most Common Complaint: {top_complaint}\n\n")
+        w("📅 **Daily Breakdown:**\n")
+        for i, day in enumerate(day_index):
+            counts = grid[i]
+            busiest = doc_index[counts.argmax()]
+            w(f"• {pd.Timestamp(day).strftime('%A %Y-%m-%d')}: "
+              f"{int(counts.sum())} appointments (busiest: {busiest})\n")
+        return buf.getvalue()
+
+    def run_all(self):
+        """Generate every report off a single shared fetch."""
+        df = self.get_appointment_data()
+        return {
+            'daily_stats': self.generate_daily_stats(df),
+            'weekly_report': self.generate_weekly_report(df),
+            'figure': self.create_visualizations(df),
+        }
+
+
+if __name__ == "__main__":
+    # Generate all reports when run directly
+    try:
+        dashboard = AnalyticsDashboard()
+        print("📊 Generating analytics reports...")
+
+        results = dashboard.run_all()
+        print(results['daily_stats'])
+        print(results['weekly_report'])
+
+        print("✅ Analytics generation complete!")
+    except Exception as e:
+        print(f"❌ Error generating analytics: {e}")
@@ -4,21 +4,32 @@ Clean Doctor Appointment Bot - Reliable Polling Version
 No webhooks, no conflicts, simple and effective
 """
 
+import asyncio
+import html
+import sys
 import logging
 import os
 import json
-import uuid
+import random
+import sqlite3
+import threading
+import time
+import secrets
 from datetime import datetime, timedelta
+from types import MappingProxyType
 from typing import Dict, Any, List, Optional
 
 from telegram import Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, ConversationHandler,
-    ContextTypes, filters
+    ContextTypes, Defaults, PicklePersistence, filters
 )
+from telegram.constants import ParseMode
 from dotenv import load_dotenv
-import gspread
-from google.oauth2.service_account import Credentials
+
+# gspread and the Google auth stack (urllib3, cryptography's RSA backend,
+# google.auth) are imported lazily in GoogleSheetsStorage.__init__ so the
+# bot's handlers and DOCTORS table load without paying that cold-start cost
 
 # Import optional feature modules (removed for simplicity)
 # from google_calendar_integration import create_calendar_event
@@ -30,6 +41,7 @@ from google.oauth2.service_account import Credentials
 load_dotenv()
 
 # Import secure configuration loader
+import secure_loader
 from secure_loader import get_secure_config
 
 # Enable logging
@@ -79,33 +91,218 @@ DOCTORS = {
     }
 }
 
+_WEEKDAY_NUMS = {
+    'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3,
+    'Friday': 4, 'Saturday': 5, 'Sunday': 6
+}
+
+# Precompute weekday numbers per doctor so availability checks compare
+# integers via date.weekday() instead of strftime'd names, and build each
+# doctor's (constant) time-slot keyboard once
+for _doctor in DOCTORS.values():
+    _doctor['available_day_nums'] = frozenset(
+        _WEEKDAY_NUMS[day] for day in _doctor['available_days'])
+    _doctor['_time_markup'] = ReplyKeyboardMarkup(
+        [[f"🕐 {slot}"] for slot in _doctor['available_times']] + [['🔙 Back']],
+        one_time_keyboard=True, resize_keyboard=True)
+
+# The table never changes after the precompute above, so freeze each
+# doctor record against accidental mutation (records are shared across
+# handlers and the background writer thread) and keep a plain tuple of
+# items for the iteration-only menu builds
+DOCTORS = {doc_id: MappingProxyType(doctor) for doc_id, doctor in DOCTORS.items()}
+DOCTORS_TUPLE = tuple(DOCTORS.items())
+
+
+def _selected_doctor(context):
+    """Resolve the user's selected doctor from the module table.
+
+    user_data keeps only the doctor id: the records are mappingproxies,
+    which PicklePersistence cannot serialize, and the lookup is a plain
+    dict probe anyway.
+    """
+    return DOCTORS[context.user_data['selected_doctor']]
+
+
+def _date_keyboard_markup(doctor):
+    """Build the next-7-days date keyboard for a doctor.
+
+    Can't be prebuilt like the time keyboard because it depends on today.
+    """
+    keyboard = []
+    today = datetime.now()
+    for i in range(7):
+        date = today + timedelta(days=i)
+        if date.weekday() in doctor['available_day_nums']:
+            keyboard.append([f"{date:%Y-%m-%d} ({date:%A})"])
+    keyboard.append(['🔙 Back'])
+    return ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
+
+
+def _build_doctor_menus():
+    """Prebuild the menu text/keyboard derived from the static DOCTORS table."""
+    book_text = "👨‍⚕️ <b>Please select a doctor:</b>\n\n"
+    view_text = "👨‍⚕️ <b>Our Medical Team</b>\n\n"
+    selection_rows = []
+    for doc_id, doctor in DOCTORS_TUPLE:
+        book_text += f"<b>{doc_id}.</b> {doctor['name']}\n"
+        book_text += f"   📋 {doctor['specialization']}\n"
+        book_text += f"   💰 Fees: {doctor['fees']}\n"
+        book_text += f"   📅 Available: {', '.join(doctor['available_days'][:3])}{'...' if len(doctor['available_days']) > 3 else ''}\n\n"
+
+        view_text += f"<b>{doctor['name']}</b>\n"
+        view_text += f"🏥 Specialization: {doctor['specialization']}\n"
+        view_text += f"💰 Consultation Fee: {doctor['fees']}\n"
+        view_text += f"📅 Available Days: {', '.join(doctor['available_days'])}\n"
+        view_text += f"🕐 Available Times: {', '.join(doctor['available_times'])}\n\n"
+
+        selection_rows.append([f"{doc_id}. {doctor['name']} - {doctor['specialization']}"])
+
+    selection_rows.append(['🔙 Back to Main Menu'])
+    markup = ReplyKeyboardMarkup(selection_rows, one_time_keyboard=True, resize_keyboard=True)
+    return book_text, view_text, markup
+
+
+# DOCTORS never changes at runtime, so all static menu text and markups
+# are built exactly once at import instead of per message
+BOOK_DOCTORS_TEXT, VIEW_DOCTORS_TEXT, DOCTOR_SELECTION_MARKUP = _build_doctor_menus()
+
+MAIN_MENU_MARKUP = ReplyKeyboardMarkup([
+    ['📅 Book Appointment', '👨‍⚕️ View Doctors'],
+    ['🏥 About Clinic', '🚨 Emergency'],
+    ['❓ Help', '📞 Contact'],
+    ['💳 Services & Pricing', '🗺️ Location']
+], one_time_keyboard=False, resize_keyboard=True)
+
+VIEW_DOCTORS_MARKUP = ReplyKeyboardMarkup([
+    ['📅 Book Appointment'],
+    ['🔙 Back to Main Menu']
+], one_time_keyboard=True, resize_keyboard=True)
+
+
+# Static conversation-step markups, shared across handlers instead of
+# being re-allocated on every message
+BACK_TO_DOCTORS_MARKUP = ReplyKeyboardMarkup(
+    [['🔙 Back to Doctor Selection']], one_time_keyboard=True, resize_keyboard=True)
+
+AGE_MARKUP = ReplyKeyboardMarkup([
+    ['1-10', '11-17', '18-25', '26-35', '36-45'],
+    ['46-55', '56-65', '66-75', '76-85', '86+'],
+    ['🔢 Enter Specific Age', '🔙 Back']
+], one_time_keyboard=True, resize_keyboard=True)
+
+AGE_GROUP_MARKUP = ReplyKeyboardMarkup([
+    ['18-25', '26-35', '36-45', '46-60', '60+'],
+    ['🔙 Back']
+], one_time_keyboard=True, resize_keyboard=True)
+
+GENDER_MARKUP = ReplyKeyboardMarkup([
+    ['👨 Male', '👩 Female', '🏳️‍⚧️ Other'],
+    ['🔙 Back']
+], one_time_keyboard=True, resize_keyboard=True)
+
+# Button label -> stored value; a single lookup instead of chained
+# str.replace scans over a closed set of options
+GENDER_MAP = {'👨 Male': 'Male', '👩 Female': 'Female', '🏳️‍⚧️ Other': 'Other'}
+
+BACK_ONLY_MARKUP = ReplyKeyboardMarkup(
+    [['🔙 Back']], one_time_keyboard=True, resize_keyboard=True)
+
+NONE_BACK_MARKUP = ReplyKeyboardMarkup(
+    [['None'], ['🔙 Back']], one_time_keyboard=True, resize_keyboard=True)
+
+CONFIRM_MARKUP = ReplyKeyboardMarkup([
+    ['✅ Confirm Appointment'],
+    ['🔙 Back', '❌ Cancel']
+], one_time_keyboard=True, resize_keyboard=True)
+
+POST_BOOK_MARKUP = ReplyKeyboardMarkup([
+    ['📅 Book Another Appointment'],
+    ['🏠 Main Menu']
+], one_time_keyboard=True, resize_keyboard=True)
+
+CANCEL_MARKUP = ReplyKeyboardMarkup([
+    ['📅 Book Appointment', '👨‍⚕️ View Doctors'],
+    ['❓ Help', '📞 Contact']
+], one_time_keyboard=False, resize_keyboard=True)
+
+
+# Service-account credentials are parsed once per process and shared by
+# every storage instance: the JSON decode and RSA key parse (~100ms) are
+# not repaid when a reconnect or worker restart rebuilds the storage.
+_creds_singleton = None
+_creds_lock = threading.Lock()
+
+
+def _get_credentials(scopes):
+    global _creds_singleton
+    if _creds_singleton is None:
+        with _creds_lock:
+            if _creds_singleton is None:
+                from google.oauth2.service_account import Credentials
+
+                creds_dict = secure_loader._parsed_google_creds
+                google_creds = os.getenv('GOOGLE_CREDENTIALS')
+                if creds_dict is not None:
+                    _creds_singleton = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+                elif google_creds:
+                    creds_dict = json.loads(google_creds)
+                    secure_loader._parsed_google_creds = creds_dict
+                    _creds_singleton = Credentials.from_service_account_info(creds_dict, scopes=scopes)
+                else:
+                    # Fallback to file (for local development)
+                    creds_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
+                    _creds_singleton = Credentials.from_service_account_file(creds_file, scopes=scopes)
+    return _creds_singleton
+
 
 class GoogleSheetsStorage:
     """Manages appointment data storage in Google Sheets."""
 
+    # Batched writes: ship at most this many buffered rows per Sheets
+    # call, checking for new work every FLUSH_INTERVAL seconds
+    FLUSH_BATCH = 50
+    FLUSH_INTERVAL = 2.0
+
     def __init__(self):
+        import gspread
+        from google.auth.transport.requests import AuthorizedSession
+        from requests.adapters import HTTPAdapter
+
         self.sheet_id = os.getenv('GOOGLE_SHEETS_ID')
         self.scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-        
-        # Try to get credentials from environment variable first (for Railway)
-        google_creds = os.getenv('GOOGLE_CREDENTIALS')
-        if google_creds:
-            import json
-            creds_dict = json.loads(google_creds)
-            self.creds = Credentials.from_service_account_info(creds_dict, scopes=self.scope)
-        else:
-            # Fallback to file (for local development)
-            creds_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
-            self.creds = Credentials.from_service_account_file(creds_file, scopes=self.scope)
-            
-        self.client = gspread.authorize(self.creds)
+        self.creds = _get_credentials(self.scope)
+
+        # One authorized session with keep-alive pooling: Sheets calls
+        # reuse TLS connections instead of handshaking per request
+        session = AuthorizedSession(self.creds)
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.client = gspread.Client(auth=self.creds, session=session)
+        self._gspread = gspread
         self.sheet = self.client.open_by_key(self.sheet_id)
         self.worksheet = self.get_or_create_worksheet('Appointments')
 
+        # Durable write-ahead buffer: rows land in SQLite first (a local
+        # commit, microseconds) and a background thread drains them to
+        # Sheets in batches. Bursts of bookings are disk-bound instead of
+        # quota-bound, and a crash no longer loses confirmed bookings.
+        self._db = sqlite3.connect('appointments.db', check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS pending ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+            'row TEXT NOT NULL, '
+            'synced INTEGER NOT NULL DEFAULT 0)')
+        self._db.commit()
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
     def get_or_create_worksheet(self, title: str):
         try:
             return self.sheet.worksheet(title)
-        except gspread.WorksheetNotFound:
+        except self._gspread.WorksheetNotFound:
             worksheet = self.sheet.add_worksheet(title=title, rows=1, cols=20)
             self.setup_headers(worksheet)
             return worksheet
@@ -116,23 +313,37 @@ class GoogleSheetsStorage:
             'Patient Name', 'Age', 'Gender', 'Number', 'Email-ID',
             'Chief Complaint', 'Preferred Date', 'Preferred Time', 'Additional Notes'
         ]
-        worksheet.append_row(headers)
-        # Format header row with bold text and background color
-        worksheet.format('A1:P1', {
-            'textFormat': {'bold': True, 'fontSize': 11},
-            'backgroundColor': {'red': 0.9, 'green': 0.9, 'blue': 0.9}
-        })
-        # Set column widths for better readability
-        worksheet.batch_update([{
-            'range': 'A:P',
-            'majorDimension': 'COLUMNS',
-            'values': [[]]
-        }])
+        # One spreadsheets.batchUpdate carrying both the header values
+        # and the bold/background formatting: a single round-trip where
+        # append_row + format used to cost two
+        self.sheet.batch_update({'requests': [
+            {'updateCells': {
+                'start': {'sheetId': worksheet.id, 'rowIndex': 0, 'columnIndex': 0},
+                'rows': [{'values': [
+                    {'userEnteredValue': {'stringValue': header}} for header in headers
+                ]}],
+                'fields': 'userEnteredValue',
+            }},
+            {'repeatCell': {
+                'range': {
+                    'sheetId': worksheet.id,
+                    'startRowIndex': 0, 'endRowIndex': 1,
+                    'startColumnIndex': 0, 'endColumnIndex': len(headers),
+                },
+                'cell': {'userEnteredFormat': {
+                    'textFormat': {'bold': True, 'fontSize': 11},
+                    'backgroundColor': {'red': 0.9, 'green': 0.9, 'blue': 0.9},
+                }},
+                'fields': 'userEnteredFormat(textFormat,backgroundColor)',
+            }},
+        ]})
 
     def add_appointment(self, appointment_data: Dict[str, Any]) -> str:
-        appointment_id = f"APT-{uuid.uuid4().hex[:8].upper()}"
+        # Callers may pre-assign the id so the user can be confirmed
+        # before this write runs (write-behind in confirm_booking)
+        appointment_id = appointment_data.get('appointment_id') or f"APT-{secrets.token_hex(4).upper()}"
         appointment_data['appointment_id'] = appointment_id
-        appointment_data['timestamp'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        appointment_data['timestamp'] = datetime.now().isoformat(sep=' ', timespec='seconds')
         appointment_data['status'] = 'Confirmed'
 
         # Extract Telegram User information
@@ -163,13 +374,75 @@ class GoogleSheetsStorage:
             appointment_data['additional_notes'],             # Column P: Additional Notes
         ]
         
-        try:
-            self.worksheet.append_row(row)
-            logger.info(f"Appointment {appointment_id} saved to Google Sheets with comprehensive user data.")
-            return appointment_id
-        except Exception as e:
-            logger.error(f"Error saving to Google Sheets: {e}")
-            return None
+        # The id is generated locally, so the booking can be acknowledged
+        # immediately; the actual Sheets write happens in the flusher
+        with self._db_lock:
+            self._db.execute('INSERT INTO pending (row) VALUES (?)', (json.dumps(row),))
+            self._db.commit()
+        self._wakeup.set()
+        logger.info(f"Appointment {appointment_id} buffered for Google Sheets.")
+        return appointment_id
+
+    # HTTP statuses worth retrying: rate limits and transient server errors
+    _RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def _flush_loop(self):
+        """Drain the SQLite buffer to Google Sheets in batches.
+
+        Up to FLUSH_BATCH unsynced rows are shipped per append_rows call
+        and marked synced on success. Transient failures (quota 429s,
+        5xx, network blips) leave the rows pending and back off
+        exponentially with jitter; permanently rejected batches are
+        dead-lettered (synced = 2) so one bad row can't wedge the queue.
+        """
+        backoff = self.FLUSH_INTERVAL
+        while True:
+            self._wakeup.wait(timeout=self.FLUSH_INTERVAL)
+            self._wakeup.clear()
+
+            with self._db_lock:
+                batch = self._db.execute(
+                    'SELECT id, row FROM pending WHERE synced = 0 ORDER BY id LIMIT ?',
+                    (self.FLUSH_BATCH,)).fetchall()
+            if not batch:
+                backoff = self.FLUSH_INTERVAL
+                continue
+
+            rows = [json.loads(row_json) for _, row_json in batch]
+            try:
+                self.worksheet.append_rows(rows, value_input_option='RAW')
+            except self._gspread.exceptions.APIError as e:
+                status = getattr(getattr(e, 'response', None), 'status_code', None)
+                if status in self._RETRYABLE_STATUSES:
+                    logger.warning(
+                        f"Sheets returned {status}, {len(rows)} row(s) stay pending; "
+                        f"retrying in ~{backoff:.0f}s")
+                    time.sleep(backoff + random.random())
+                    backoff = min(backoff * 2, 60.0)
+                else:
+                    # Permanent rejection (bad request, auth, missing sheet):
+                    # retrying can't succeed, so park the rows for inspection
+                    logger.error(f"Sheets rejected batch permanently ({status}), "
+                                 f"dead-lettering {len(rows)} row(s): {e}")
+                    with self._db_lock:
+                        self._db.executemany('UPDATE pending SET synced = 2 WHERE id = ?',
+                                             [(row_id,) for row_id, _ in batch])
+                        self._db.commit()
+                    backoff = self.FLUSH_INTERVAL
+                continue
+            except Exception as e:
+                # Connection resets, DNS failures etc. are transient
+                logger.error(f"Error saving to Google Sheets, {len(rows)} row(s) stay pending: {e}")
+                time.sleep(backoff + random.random())
+                backoff = min(backoff * 2, 60.0)
+                continue
+
+            with self._db_lock:
+                self._db.executemany('UPDATE pending SET synced = 1 WHERE id = ?',
+                                     [(row_id,) for row_id, _ in batch])
+                self._db.commit()
+            logger.info(f"Flushed {len(rows)} appointment(s) to Google Sheets.")
+            backoff = self.FLUSH_INTERVAL
 
 # Global storage instance - will be initialized in main()
 appointment_storage = None
@@ -179,7 +452,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     user = update.effective_user
     
     welcome_message = f"""
-🏥 **Welcome to Doctor Appointment Bot, {user.first_name}!**
+🏥 <b>Welcome to Doctor Appointment Bot, {html.escape(user.first_name or '')}!</b>
 
 I'll help you book an appointment with our doctors.
 
@@ -191,61 +464,27 @@ Available Services:
 Click ❓ Help for instructions on how to use this bot!
 Or use the menu below:
 """
-    
-    keyboard = [
-        ['📅 Book Appointment', '👨‍⚕️ View Doctors'],
-        ['🏥 About Clinic', '🚨 Emergency'],
-        ['❓ Help', '📞 Contact'],
-        ['💳 Services & Pricing', '🗺️ Location']
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=False, resize_keyboard=True)
-    
-    await update.message.reply_text(welcome_message, reply_markup=reply_markup, parse_mode='Markdown')
+
+    await update.message.reply_text(welcome_message, reply_markup=MAIN_MENU_MARKUP, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
 async def return_to_main_menu_silently(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Return to main menu without displaying any message."""
-    keyboard = [
-        ['📅 Book Appointment', '👨‍⚕️ View Doctors'],
-        ['🏥 About Clinic', '🚨 Emergency'],
-        ['❓ Help', '📞 Contact'],
-        ['💳 Services & Pricing', '🗺️ Location']
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=False, resize_keyboard=True)
-    
     # Just update the keyboard without sending a message
-    await update.message.reply_text("🏠 Main Menu", reply_markup=reply_markup)
+    await update.message.reply_text("🏠 Main Menu", reply_markup=MAIN_MENU_MARKUP)
     return MAIN_MENU
 
 async def main_menu_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle main menu selections."""
-    text = update.message.text
-    
-    # Handle back to main menu silently
-    if text in ['🏠 Main Menu', '🔙 Back to Main Menu']:
-        return await return_to_main_menu_silently(update, context)
-    
-    handlers = {
-        '📅 Book Appointment': book_appointment,
-        '👨‍⚕️ View Doctors': view_doctors,
-        '🏥 About Clinic': about_clinic,
-        '🚨 Emergency': emergency_contact,
-        '❓ Help': show_help,
-        '📞 Contact': show_contact,
-        '💳 Services & Pricing': services_pricing,
-        '🗺️ Location': clinic_location
-    }
-
-    if text in handlers:
-        return await handlers[text](update, context)
-    else:
-        # Automatically show help for unrecognized input
-        return await show_help(update, context)
+    # Single hashed lookup in the module-level dispatch table; unknown
+    # input falls through to help
+    handler = MAIN_MENU_DISPATCH.get(update.message.text, show_help)
+    return await handler(update, context)
 
 async def about_clinic(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show information about the clinic."""
     about_text = """
-🏥 **About Our Clinic**
+🏥 <b>About Our Clinic</b>
 
 Welcome to our medical clinic where we prioritize your health and well-being.
 We have a team of expert doctors specializing in various fields to provide
@@ -255,38 +494,38 @@ Our mission is to offer compassionate and personalized care to each patient.
 We look forward to serving you and helping you maintain a healthy life.
 
 """
-    await update.message.reply_text(about_text, parse_mode='Markdown')
+    await update.message.reply_text(about_text, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
 async def emergency_contact(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show emergency contact information."""
     emergency_text = """
-🚨 **Emergency Contact Information**
+🚨 <b>Emergency Contact Information</b>
 
 For medical emergencies, please contact the local emergency services
 immediately or visit the nearest hospital.
 
-**Emergency Hotline:** 911
+<b>Emergency Hotline:</b> 911
 
 Stay safe and take care!
 
 """
-    await update.message.reply_text(emergency_text, parse_mode='Markdown')
+    await update.message.reply_text(emergency_text, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
 async def show_help(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Display help instructions."""
     help_text = """
-🆘 **Help & Instructions**
+🆘 <b>Help & Instructions</b>
 
-**How to book an appointment:**
+<b>How to book an appointment:</b>
 1. Click '📅 Book Appointment'
 2. Select your preferred doctor
 3. Fill in your details
 4. Choose date and time
 5. Confirm your booking
 
-**Available Commands:**
+<b>Available Commands:</b>
 • /start - Start over
 • /book - Book appointment
 • /doctors - View doctors
@@ -294,34 +533,34 @@ async def show_help(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 Need assistance? Contact us at support@clinic.com
 """
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+    await update.message.reply_text(help_text, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
 async def show_contact(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Display contact information."""
     contact_text = """
-📞 **Contact Information**
+📞 <b>Contact Information</b>
 
-**Clinic Address:**
+<b>Clinic Address:</b>
 123 Health Street, Medical District
 City, State 12345
 
-**Phone:** +1 (555) 123-4567
-**Email:** info@clinic.com
-**Website:** www.clinic.com
+<b>Phone:</b> +1 (555) 123-4567
+<b>Email:</b> info@clinic.com
+<b>Website:</b> www.clinic.com
 
-**Office Hours:**
+<b>Office Hours:</b>
 Monday - Friday: 9:00 AM - 6:00 PM
 Saturday: 10:00 AM - 4:00 PM
 Sunday: Closed
 """
-    await update.message.reply_text(contact_text, parse_mode='Markdown')
+    await update.message.reply_text(contact_text, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
 async def services_pricing(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show services and pricing information."""
     services_text = """
-💳 **Services & Pricing**
+💳 <b>Services & Pricing</b>
 
 We offer a wide range of medical services including General Medicine, Cardiology,
 Dermatology, and Orthopedics. Our pricing is competitive, and we ensure top-notch
@@ -331,66 +570,56 @@ For detailed pricing information and to learn more about our services,
 please contact our reception desk.
 
 """
-    await update.message.reply_text(services_text, parse_mode='Markdown')
+    await update.message.reply_text(services_text, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
 async def clinic_location(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Provide clinic location and map link."""
     location_text = """
-🗺️ **Clinic Location**
+🗺️ <b>Clinic Location</b>
 
 Visit us at:
 123 Health Street, Medical District,
 City, State 12345
 
 For directions and more information, please visit our website:
-[www.clinic.com](http://www.clinic.com)
+<a href="http://www.clinic.com">www.clinic.com</a>
 
 We look forward to welcoming you to our clinic!
 
 """
-    await update.message.reply_text(location_text, parse_mode='Markdown')
+    await update.message.reply_text(location_text, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
 async def book_appointment(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start the appointment booking process."""
-    doctors_text = "👨‍⚕️ **Please select a doctor:**\n\n"
-    
-    keyboard = []
-    for doc_id, doctor in DOCTORS.items():
-        doctors_text += f"**{doc_id}.** {doctor['name']}\n"
-        doctors_text += f"   📋 {doctor['specialization']}\n"
-        doctors_text += f"   💰 Fees: {doctor['fees']}\n"
-        doctors_text += f"   📅 Available: {', '.join(doctor['available_days'][:3])}{'...' if len(doctor['available_days']) > 3 else ''}\n\n"
-        
-        keyboard.append([f"{doc_id}. {doctor['name']} - {doctor['specialization']}"])
-    
-    keyboard.append(['🔙 Back to Main Menu'])
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
-    await update.message.reply_text(doctors_text, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(
+        BOOK_DOCTORS_TEXT, reply_markup=DOCTOR_SELECTION_MARKUP, parse_mode=ParseMode.HTML)
     return DOCTOR_SELECTION
 
 async def view_doctors(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show detailed doctor information."""
-    doctors_text = "👨‍⚕️ **Our Medical Team**\n\n"
-    
-    for doc_id, doctor in DOCTORS.items():
-        doctors_text += f"**{doctor['name']}**\n"
-        doctors_text += f"🏥 Specialization: {doctor['specialization']}\n"
-        doctors_text += f"💰 Consultation Fee: {doctor['fees']}\n"
-        doctors_text += f"📅 Available Days: {', '.join(doctor['available_days'])}\n"
-        doctors_text += f"🕐 Available Times: {', '.join(doctor['available_times'])}\n\n"
-    
-    keyboard = [
-        ['📅 Book Appointment'],
-        ['🔙 Back to Main Menu']
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
-    await update.message.reply_text(doctors_text, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(
+        VIEW_DOCTORS_TEXT, reply_markup=VIEW_DOCTORS_MARKUP, parse_mode=ParseMode.HTML)
     return MAIN_MENU
 
+# Menu label -> handler coroutine, built once at import. Labels are
+# interned so the dict lookup on every menu press starts with pointer
+# comparisons against the incoming (also-interned) short message text.
+MAIN_MENU_DISPATCH = {sys.intern(label): handler for label, handler in (
+    ('🏠 Main Menu', return_to_main_menu_silently),
+    ('🔙 Back to Main Menu', return_to_main_menu_silently),
+    ('📅 Book Appointment', book_appointment),
+    ('👨‍⚕️ View Doctors', view_doctors),
+    ('🏥 About Clinic', about_clinic),
+    ('🚨 Emergency', emergency_contact),
+    ('❓ Help', show_help),
+    ('📞 Contact', show_contact),
+    ('💳 Services & Pricing', services_pricing),
+    ('🗺️ Location', clinic_location),
+)}
+
+
 async def doctor_selected(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Handle doctor selection."""
     text = update.message.text
@@ -406,19 +635,16 @@ async def doctor_selected(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         doctor = DOCTORS[doctor_id]
         
         confirmation_text = f"""
-✅ **Doctor Selected:**
+✅ <b>Doctor Selected:</b>
 {doctor['name']} - {doctor['specialization']}
 Consultation Fee: {doctor['fees']}
 
 Now, let's get your details...
 
-👤 **Please enter your full name:**
+👤 <b>Please enter your full name:</b>
 """
         
-        keyboard = [['🔙 Back to Doctor Selection']]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        
-        await update.message.reply_text(confirmation_text, reply_markup=reply_markup, parse_mode='Markdown')
+        await update.message.reply_text(confirmation_text, reply_markup=BACK_TO_DOCTORS_MARKUP, parse_mode=ParseMode.HTML)
         return PATIENT_NAME
     else:
         await update.message.reply_text("❌ Invalid selection. Please choose a doctor from the list.")
@@ -433,20 +659,10 @@ async def patient_name_received(update: Update, context: ContextTypes.DEFAULT_TY
     
     context.user_data['patient_name'] = text
     
-    # Create individual age options from 1 to 100
-    keyboard = []
-    
-    # Common age ranges for easier selection
-    keyboard.append(['1-10', '11-17', '18-25', '26-35', '36-45'])
-    keyboard.append(['46-55', '56-65', '66-75', '76-85', '86+'])
-    keyboard.append(['🔢 Enter Specific Age', '🔙 Back'])
-    
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
     await update.message.reply_text(
-        f"✅ Name recorded: **{text}**\n\n👤 **Please select your age range or enter specific age:**",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        f"✅ Name recorded: <b>{html.escape(text)}</b>\n\n👤 <b>Please select your age range or enter specific age:</b>",
+        reply_markup=AGE_MARKUP,
+        parse_mode=ParseMode.HTML
     )
     return PATIENT_AGE
 async def patient_age_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -454,25 +670,19 @@ async def patient_age_received(update: Update, context: ContextTypes.DEFAULT_TYP
     text = update.message.text
     
     if text == '🔙 Back':
-        await update.message.reply_text("👤 **Please enter your full name:**")
+        await update.message.reply_text("👤 <b>Please enter your full name:</b>")
         return PATIENT_NAME
 
     if text == '🔢 Enter Specific Age':
-        await update.message.reply_text("🔢 **Enter your specific age (1-100):**")
+        await update.message.reply_text("🔢 <b>Enter your specific age (1-100):</b>")
         return PATIENT_SPECIFIC_AGE
     
     context.user_data['patient_age'] = text
     
-    keyboard = [
-        ['👨 Male', '👩 Female', '🏳️‍⚧️ Other'],
-        ['🔙 Back']
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
     await update.message.reply_text(
-        f"✅ Age group recorded: **{text}**\n\n⚧ **Please select your gender:**",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        f"✅ Age group recorded: <b>{html.escape(text)}</b>\n\n⚧ <b>Please select your gender:</b>",
+        reply_markup=GENDER_MARKUP,
+        parse_mode=ParseMode.HTML
     )
     return PATIENT_GENDER
 
@@ -482,16 +692,10 @@ async def patient_specific_age_received(update: Update, context: ContextTypes.DE
 
     if text.isdigit() and 1 <= int(text) <= 100:
         context.user_data['patient_age'] = text
-        keyboard = [
-            ['👨 Male', '👩 Female', '🏳️‍⚧️ Other'],
-            ['🔙 Back']
-        ]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        
         await update.message.reply_text(
-            f"✅ Specific age recorded: **{text}**\n\n⚧ **Please select your gender:**",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            f"✅ Specific age recorded: <b>{text}</b>\n\n⚧ <b>Please select your gender:</b>",
+            reply_markup=GENDER_MARKUP,
+            parse_mode=ParseMode.HTML
         )
         return PATIENT_GENDER
     else:
@@ -504,23 +708,15 @@ async def patient_gender_received(update: Update, context: ContextTypes.DEFAULT_
     text = update.message.text
     
     if text == '🔙 Back':
-        keyboard = [
-            ['18-25', '26-35', '36-45', '46-60', '60+'],
-            ['🔙 Back']
-        ]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        await update.message.reply_text("👤 **Please select your age group:**", reply_markup=reply_markup, parse_mode='Markdown')
+        await update.message.reply_text("👤 <b>Please select your age group:</b>", reply_markup=AGE_GROUP_MARKUP, parse_mode=ParseMode.HTML)
         return PATIENT_AGE
     
-    context.user_data['patient_gender'] = text.replace('👨 ', '').replace('👩 ', '').replace('🏳️‍⚧️ ', '')
-    
-    keyboard = [['🔙 Back']]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
+    context.user_data['patient_gender'] = GENDER_MAP.get(text, text)
     
     await update.message.reply_text(
-        f"✅ Gender recorded: **{context.user_data['patient_gender']}**\n\n📞 **Please enter your phone number:**\n(Example: +1 555-123-4567)",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        f"✅ Gender recorded: <b>{html.escape(context.user_data['patient_gender'])}</b>\n\n📞 <b>Please enter your phone number:</b>\n(Example: +1 555-123-4567)",
+        reply_markup=BACK_ONLY_MARKUP,
+        parse_mode=ParseMode.HTML
     )
     return PATIENT_PHONE
 
@@ -529,23 +725,15 @@ async def patient_phone_received(update: Update, context: ContextTypes.DEFAULT_T
     text = update.message.text
     
     if text == '🔙 Back':
-        keyboard = [
-            ['👨 Male', '👩 Female', '🏳️‍⚧️ Other'],
-            ['🔙 Back']
-        ]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        await update.message.reply_text("⚧ **Please select your gender:**", reply_markup=reply_markup, parse_mode='Markdown')
+        await update.message.reply_text("⚧ <b>Please select your gender:</b>", reply_markup=GENDER_MARKUP, parse_mode=ParseMode.HTML)
         return PATIENT_GENDER
     
     context.user_data['patient_phone'] = text
     
-    keyboard = [['🔙 Back']]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
     await update.message.reply_text(
-        f"✅ Phone recorded: **{text}**\n\n📧 **Please enter your email address:**\n(Example: john@example.com)",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        f"✅ Phone recorded: <b>{html.escape(text)}</b>\n\n📧 <b>Please enter your email address:</b>\n(Example: john@example.com)",
+        reply_markup=BACK_ONLY_MARKUP,
+        parse_mode=ParseMode.HTML
     )
     return PATIENT_EMAIL
 
@@ -554,24 +742,19 @@ async def patient_email_received(update: Update, context: ContextTypes.DEFAULT_T
     text = update.message.text
     
     if text == '🔙 Back':
-        keyboard = [['🔙 Back']]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
         await update.message.reply_text(
-            "📞 **Please enter your phone number:**\n(Example: +1 555-123-4567)",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            "📞 <b>Please enter your phone number:</b>\n(Example: +1 555-123-4567)",
+            reply_markup=BACK_ONLY_MARKUP,
+            parse_mode=ParseMode.HTML
         )
         return PATIENT_PHONE
     
     context.user_data['patient_email'] = text
     
-    keyboard = [['🔙 Back']]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
     await update.message.reply_text(
-        f"✅ Email recorded: **{text}**\n\n🏥 **Please describe your chief complaint or reason for visit:**\n(Example: Regular checkup, chest pain, skin rash, etc.)",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        f"✅ Email recorded: <b>{html.escape(text)}</b>\n\n🏥 <b>Please describe your chief complaint or reason for visit:</b>\n(Example: Regular checkup, chest pain, skin rash, etc.)",
+        reply_markup=BACK_ONLY_MARKUP,
+        parse_mode=ParseMode.HTML
     )
     return CHIEF_COMPLAINT
 
@@ -580,38 +763,23 @@ async def chief_complaint_received(update: Update, context: ContextTypes.DEFAULT
     text = update.message.text
     
     if text == '🔙 Back':
-        keyboard = [['🔙 Back']]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
         await update.message.reply_text(
-            "📧 **Please enter your email address:**\n(Example: john@example.com)",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            "📧 <b>Please enter your email address:</b>\n(Example: john@example.com)",
+            reply_markup=BACK_ONLY_MARKUP,
+            parse_mode=ParseMode.HTML
         )
         return PATIENT_EMAIL
     
     context.user_data['chief_complaint'] = text
     
     # Show available days for the selected doctor
-    doctor_id = context.user_data['selected_doctor']
-    doctor = DOCTORS[doctor_id] 
-    available_days = doctor['available_days']
-    
-    keyboard = []
-    # Generate next 7 days
-    today = datetime.now()
-    for i in range(7):
-        date = today + timedelta(days=i)
-        day_name = date.strftime('%A')
-        if day_name in available_days:
-            keyboard.append([f"{date.strftime('%Y-%m-%d')} ({day_name})"])
-    
-    keyboard.append(['🔙 Back'])
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
+    doctor = _selected_doctor(context)
+    reply_markup = _date_keyboard_markup(doctor)
+
     await update.message.reply_text(
-        f"✅ Chief complaint recorded: **{text}**\n\n📅 **Please select your preferred date:**\n(Showing available days for {doctor['name']})",
+        f"✅ Chief complaint recorded: <b>{html.escape(text)}</b>\n\n📅 <b>Please select your preferred date:</b>\n(Showing available days for {doctor['name']})",
         reply_markup=reply_markup,
-        parse_mode='Markdown'
+        parse_mode=ParseMode.HTML
     )
     return PREFERRED_DATE
 
@@ -620,12 +788,10 @@ async def preferred_date_received(update: Update, context: ContextTypes.DEFAULT_
     text = update.message.text
     
     if text == '🔙 Back':
-        keyboard = [['🔙 Back']]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
         await update.message.reply_text(
-            "🏥 **Please describe your chief complaint or reason for visit:**\n(Example: Regular checkup, chest pain, skin rash, etc.)",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            "🏥 <b>Please describe your chief complaint or reason for visit:</b>\n(Example: Regular checkup, chest pain, skin rash, etc.)",
+            reply_markup=BACK_ONLY_MARKUP,
+            parse_mode=ParseMode.HTML
         )
         return CHIEF_COMPLAINT
     
@@ -633,22 +799,13 @@ async def preferred_date_received(update: Update, context: ContextTypes.DEFAULT_
     selected_date = text.split(' ')[0]
     context.user_data['preferred_date'] = selected_date
     
-    # Show available times for the selected doctor
-    doctor_id = context.user_data['selected_doctor']
-    doctor = DOCTORS[doctor_id]
-    available_times = doctor['available_times']
-    
-    keyboard = []
-    for time in available_times:
-        keyboard.append([f"🕐 {time}"])
-    
-    keyboard.append(['🔙 Back'])
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
+    # Show available times for the selected doctor (prebuilt markup)
+    doctor = _selected_doctor(context)
+
     await update.message.reply_text(
-        f"✅ Date selected: **{selected_date}**\n\n🕐 **Please select your preferred time:**",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        f"✅ Date selected: <b>{html.escape(selected_date)}</b>\n\n🕐 <b>Please select your preferred time:</b>",
+        reply_markup=doctor['_time_markup'],
+        parse_mode=ParseMode.HTML
     )
     return PREFERRED_TIME
 
@@ -658,63 +815,46 @@ async def preferred_time_received(update: Update, context: ContextTypes.DEFAULT_
     
     if text == '🔙 Back':
         # Regenerate date options
-        doctor_id = context.user_data['selected_doctor']
-        doctor = DOCTORS[doctor_id]
-        available_days = doctor['available_days']
-        
-        keyboard = []
-        today = datetime.now()
-        for i in range(7):
-            date = today + timedelta(days=i)
-            day_name = date.strftime('%A')
-            if day_name in available_days:
-                keyboard.append([f"{date.strftime('%Y-%m-%d')} ({day_name})"])
-        
-        keyboard.append(['🔙 Back'])
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        
+        reply_markup = _date_keyboard_markup(_selected_doctor(context))
+
         await update.message.reply_text(
-            "📅 **Please select your preferred date:**",
+            "📅 <b>Please select your preferred date:</b>",
             reply_markup=reply_markup,
-            parse_mode='Markdown'
+            parse_mode=ParseMode.HTML
         )
         return PREFERRED_DATE
     
-    # Extract time from selection
-    selected_time = text.replace('🕐 ', '')
+    # Extract time from selection (strip the leading clock emoji)
+    selected_time = text[2:] if text.startswith('🕐 ') else text
     context.user_data['preferred_time'] = selected_time
     
     # Show booking confirmation
-    doctor_id = context.user_data['selected_doctor']
-    doctor = DOCTORS[doctor_id]
+    doctor = _selected_doctor(context)
     
     confirmation_text = f"""
-📋 **Appointment Summary**
+📋 <b>Appointment Summary</b>
 
-👨‍⚕️ **Doctor:** {doctor['name']}
-🏥 **Specialization:** {doctor['specialization']}
-💰 **Consultation Fee:** {doctor['fees']}
+👨‍⚕️ <b>Doctor:</b> {doctor['name']}
+🏥 <b>Specialization:</b> {doctor['specialization']}
+💰 <b>Consultation Fee:</b> {doctor['fees']}
 
-👤 **Patient Details:**
-• Name: {context.user_data['patient_name']}
-• Age: {context.user_data['patient_age']}
-• Gender: {context.user_data['patient_gender']}
-• Phone: {context.user_data['patient_phone']}
-• Email: {context.user_data['patient_email']}
+👤 <b>Patient Details:</b>
+• Name: {html.escape(context.user_data['patient_name'])}
+• Age: {html.escape(context.user_data['patient_age'])}
+• Gender: {html.escape(context.user_data['patient_gender'])}
+• Phone: {html.escape(context.user_data['patient_phone'])}
+• Email: {html.escape(context.user_data['patient_email'])}
 
-🏥 **Appointment Details:**
-• Chief Complaint: {context.user_data['chief_complaint']}
-• Date: {context.user_data['preferred_date']}
-• Time: {context.user_data['preferred_time']}
+🏥 <b>Appointment Details:</b>
+• Chief Complaint: {html.escape(context.user_data['chief_complaint'])}
+• Date: {html.escape(context.user_data['preferred_date'])}
+• Time: {html.escape(context.user_data['preferred_time'])}
 
-❓ **Additional Notes (Optional)**
+❓ <b>Additional Notes (Optional)</b>
 Please enter any additional notes or type "None" to skip:
 """
     
-    keyboard = [['None'], ['🔙 Back']]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-    
-    await update.message.reply_text(confirmation_text, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(confirmation_text, reply_markup=NONE_BACK_MARKUP, parse_mode=ParseMode.HTML)
     return ADDITIONAL_NOTES
 
 async def additional_notes_received(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -722,52 +862,34 @@ async def additional_notes_received(update: Update, context: ContextTypes.DEFAUL
     text = update.message.text
     
     if text == '🔙 Back':
-        doctor_id = context.user_data['selected_doctor']
-        doctor = DOCTORS[doctor_id]
-        available_times = doctor['available_times']
-        
-        keyboard = []
-        for time in available_times:
-            keyboard.append([f"🕐 {time}"])
-        
-        keyboard.append(['🔙 Back'])
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        
         await update.message.reply_text(
-            "🕐 **Please select your preferred time:**",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            "🕐 <b>Please select your preferred time:</b>",
+            reply_markup=_selected_doctor(context)['_time_markup'],
+            parse_mode=ParseMode.HTML
         )
         return PREFERRED_TIME
     
     context.user_data['additional_notes'] = text if text != 'None' else ''
     
     # Final confirmation
-    doctor_id = context.user_data['selected_doctor']
-    doctor = DOCTORS[doctor_id]
+    doctor = _selected_doctor(context)
     
     final_confirmation = f"""
-✅ **Final Appointment Confirmation**
+✅ <b>Final Appointment Confirmation</b>
 
-👨‍⚕️ **Doctor:** {doctor['name']} ({doctor['specialization']})
-👤 **Patient:** {context.user_data['patient_name']}
-📅 **Date & Time:** {context.user_data['preferred_date']} at {context.user_data['preferred_time']}
-💰 **Fee:** {doctor['fees']}
-🏥 **Reason:** {context.user_data['chief_complaint']}
+👨‍⚕️ <b>Doctor:</b> {doctor['name']} ({doctor['specialization']})
+👤 <b>Patient:</b> {html.escape(context.user_data['patient_name'])}
+📅 <b>Date & Time:</b> {html.escape(context.user_data['preferred_date'])} at {html.escape(context.user_data['preferred_time'])}
+💰 <b>Fee:</b> {doctor['fees']}
+🏥 <b>Reason:</b> {html.escape(context.user_data['chief_complaint'])}
 """
     
     if context.user_data['additional_notes']:
-        final_confirmation += f"📝 **Notes:** {context.user_data['additional_notes']}\n"
-    
-    final_confirmation += "\n**Please confirm your appointment:**"
+        final_confirmation += f"📝 <b>Notes:</b> {html.escape(context.user_data['additional_notes'])}\n"
     
-    keyboard = [
-        ['✅ Confirm Appointment'],
-        ['🔙 Back', '❌ Cancel']
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
+    final_confirmation += "\n<b>Please confirm your appointment:</b>"
     
-    await update.message.reply_text(final_confirmation, reply_markup=reply_markup, parse_mode='Markdown')
+    await update.message.reply_text(final_confirmation, reply_markup=CONFIRM_MARKUP, parse_mode=ParseMode.HTML)
     return CONFIRM_BOOKING
 
 async def confirm_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -775,13 +897,10 @@ async def confirm_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     text = update.message.text
     
     if text == '🔙 Back':
-        keyboard = [['None'], ['🔙 Back']]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        
         await update.message.reply_text(
-            "❓ **Additional Notes (Optional)**\nPlease enter any additional notes or type 'None' to skip:",
-            reply_markup=reply_markup,
-            parse_mode='Markdown'
+            "❓ <b>Additional Notes (Optional)</b>\nPlease enter any additional notes or type 'None' to skip:",
+            reply_markup=NONE_BACK_MARKUP,
+            parse_mode=ParseMode.HTML
         )
         return ADDITIONAL_NOTES
     
@@ -789,6 +908,8 @@ async def confirm_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return await cancel_booking(update, context)
     
     elif text == '✅ Confirm Appointment':
+        doctor = _selected_doctor(context)
+
         # Collect comprehensive user information
         user = update.effective_user
         user_info = {
@@ -805,9 +926,9 @@ async def confirm_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             'username': user.username or 'N/A',
             'user_info': user_info,
             'doctor_id': context.user_data['selected_doctor'],
-            'doctor_name': DOCTORS[context.user_data['selected_doctor']]['name'],
-            'doctor_specialization': DOCTORS[context.user_data['selected_doctor']]['specialization'],
-            'doctor_fees': DOCTORS[context.user_data['selected_doctor']]['fees'],
+            'doctor_name': doctor['name'],
+            'doctor_specialization': doctor['specialization'],
+            'doctor_fees': doctor['fees'],
             'patient_name': context.user_data['patient_name'],
             'patient_age': context.user_data['patient_age'],
             'patient_gender': context.user_data['patient_gender'],
@@ -818,40 +939,46 @@ async def confirm_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             'preferred_time': context.user_data['preferred_time'],
             'additional_notes': context.user_data.get('additional_notes', ''),
         }
-        
-        appointment_id = appointment_storage.add_appointment(appointment_data)
-        
+
+        # The id is random and generated locally, so the user can be
+        # confirmed right away; the Sheets write happens behind the reply
+        appointment_id = f"APT-{secrets.token_hex(4).upper()}"
+        appointment_data['appointment_id'] = appointment_id
+
         success_message = f"""
-🎉 **Appointment Confirmed Successfully!**
+🎉 <b>Appointment Confirmed Successfully!</b>
 
-📋 **Appointment ID:** `{appointment_id}`
+📋 <b>Appointment ID:</b> <code>{appointment_id}</code>
 
-👨‍⚕️ **Doctor:** {appointment_data['doctor_name']}
-👤 **Patient:** {appointment_data['patient_name']}
-📅 **Date & Time:** {appointment_data['preferred_date']} at {appointment_data['preferred_time']}
+👨‍⚕️ <b>Doctor:</b> {appointment_data['doctor_name']}
+👤 <b>Patient:</b> {html.escape(appointment_data['patient_name'])}
+📅 <b>Date & Time:</b> {html.escape(appointment_data['preferred_date'])} at {html.escape(appointment_data['preferred_time'])}
 
-📧 **Next Steps:**
+📧 <b>Next Steps:</b>
 1. You will receive a confirmation email shortly
 2. Please arrive 15 minutes before your appointment
 3. Bring a valid ID and insurance card
 4. Save this appointment ID for your records
 
-💰 **Payment:** {appointment_data['doctor_fees']} (payable at the clinic)
+💰 <b>Payment:</b> {appointment_data['doctor_fees']} (payable at the clinic)
 
-❓ **Need to modify or cancel?**
+❓ <b>Need to modify or cancel?</b>
 Please contact us at +1 (555) 123-4567
 
 Thank you for choosing our clinic! 🏥
 """
         
-        keyboard = [
-            ['📅 Book Another Appointment'],
-            ['🏠 Main Menu']
-        ]
-        reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=True, resize_keyboard=True)
-        
-        await update.message.reply_text(success_message, reply_markup=reply_markup, parse_mode='Markdown')
-        
+        await update.message.reply_text(success_message, reply_markup=POST_BOOK_MARKUP, parse_mode=ParseMode.HTML)
+
+        # Write-behind: persist to Sheets after the confirmation is out.
+        # Failures are logged by the storage layer and the row stays in
+        # its retry queue, so nothing is lost if the write misbehaves.
+        # The application tracks the task (a bare create_task holds only
+        # a weak reference and could be collected before running) and
+        # routes exceptions to the PTB error handler.
+        context.application.create_task(asyncio.to_thread(
+            appointment_storage.add_appointment, appointment_data))
+
         # Clear user data
         context.user_data.clear()
         
@@ -863,16 +990,10 @@ Thank you for choosing our clinic! 🏥
 
 async def cancel_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Cancel the current booking process."""
-    keyboard = [
-        ['📅 Book Appointment', '👨‍⚕️ View Doctors'],
-        ['❓ Help', '📞 Contact']
-    ]
-    reply_markup = ReplyKeyboardMarkup(keyboard, one_time_keyboard=False, resize_keyboard=True)
-    
     await update.message.reply_text(
-        "❌ **Appointment booking cancelled.**\n\nWhat would you like to do next?",
-        reply_markup=reply_markup,
-        parse_mode='Markdown'
+        "❌ <b>Appointment booking cancelled.</b>\n\nWhat would you like to do next?",
+        reply_markup=CANCEL_MARKUP,
+        parse_mode=ParseMode.HTML
     )
     
     # Clear user data
@@ -883,39 +1004,39 @@ async def cancel_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Show help information."""
     help_text = """
-🆘 **Help & Instructions**
+🆘 <b>Help & Instructions</b>
 
-**Available Commands:**
+<b>Available Commands:</b>
 • /start - Start the bot
 • /book - Book an appointment
 • /doctors - View available doctors
 • /help - Show this help message
 
-**How to book an appointment:**
+<b>How to book an appointment:</b>
 1. Use /book or click '📅 Book Appointment'
 2. Select your preferred doctor
 3. Fill in your personal details
 4. Choose your preferred date and time
 5. Review and confirm your booking
 
-**Features:**
+<b>Features:</b>
 ✅ Easy appointment booking
 ✅ Multiple specialist doctors
 ✅ Flexible scheduling
 ✅ Instant confirmation
 ✅ Appointment ID for tracking
 
-**Support:**
+<b>Support:</b>
 📞 Phone: +1 (555) 123-4567
 📧 Email: support@clinic.com
 
-**Office Hours:**
+<b>Office Hours:</b>
 Monday - Friday: 9:00 AM - 6:00 PM
 Saturday: 10:00 AM - 4:00 PM
 Sunday: Closed
 """
     
-    await update.message.reply_text(help_text, parse_mode='Markdown')
+    await update.message.reply_text(help_text, parse_mode=ParseMode.HTML)
     return ConversationHandler.END
 
 async def doctors_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -929,6 +1050,14 @@ async def book_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
 
 def main() -> None:
     """Run the bot."""
+    # The whole hot path is asyncio I/O (Telegram long-poll, off-loop
+    # storage hops), so swap in libuv's loop when it's installed
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
     print("🏥 Starting Doctor Appointment Bot with Secure Configuration...")
     print("=" * 60)
     
@@ -977,14 +1106,36 @@ def main() -> None:
         print("Please check your credentials and sheet permissions.")
         return
     
-    print("✅ Storage system initialized")
-    print("🤖 Available doctors:")
-    for doc_id, doctor in DOCTORS.items():
-        print(f"   • {doctor['name']} - {doctor['specialization']} ({doctor['fees']})")
-    print()
-    
-    # Create application
-    application = Application.builder().token(bot_token).build()
+    # One buffered write instead of a flush per line; the doctor roster
+    # is only worth printing when someone asked for a verbose start
+    banner = ["✅ Storage system initialized"]
+    if os.getenv('BOT_VERBOSE'):
+        banner.append("🤖 Available doctors:")
+        for doc_id, doctor in DOCTORS_TUPLE:
+            banner.append(f"   • {doctor['name']} - {doctor['specialization']} ({doctor['fees']})")
+    print("\n".join(banner) + "\n")
+    
+    # Create application (read timeout must outlast the long-poll window).
+    # block=False + concurrent_updates lets the dispatcher keep pulling
+    # updates while a handler awaits Sheets or Telegram I/O, instead of
+    # serializing every user behind the slowest request
+    # Conversation state survives restarts: a redeploy mid-booking no
+    # longer dumps every user back to the main menu
+    persistence = PicklePersistence(filepath='bot_state.pkl')
+
+    application = (
+        Application.builder()
+        .token(bot_token)
+        .persistence(persistence)
+        .defaults(Defaults(block=False))
+        .concurrent_updates(True)
+        .get_updates_read_timeout(55)
+        .get_updates_connect_timeout(10)
+        .connection_pool_size(32)
+        .pool_timeout(30)
+        .get_updates_connection_pool_size(2)
+        .build()
+    )
     
     # Create conversation handler
     conv_handler = ConversationHandler(
@@ -1040,6 +1191,8 @@ def main() -> None:
             CommandHandler('doctors', doctors_command),
             CommandHandler('book', book_command),
         ],
+        persistent=True,
+        name='booking',
     )
     
     # Add handlers
@@ -1047,17 +1200,23 @@ def main() -> None:
     application.add_handler(CommandHandler('help', help_command))
     application.add_handler(CommandHandler('doctors', doctors_command))
     
-    print("🚀 Bot is starting with polling...")
-    print("📱 Your bot is now ready to receive messages!")
-    print("💬 Send /start to your bot on Telegram to begin")
-    print()
-    print("Press Ctrl+C to stop the bot.")
-    print("=" * 50)
+    print("\n".join((
+        "🚀 Bot is starting with polling...",
+        "📱 Your bot is now ready to receive messages!",
+        "💬 Send /start to your bot on Telegram to begin",
+        "",
+        "Press Ctrl+C to stop the bot.",
+        "=" * 50,
+    )))
     
     # Run the bot
     try:
         application.run_polling(
-            allowed_updates=Update.ALL_TYPES,
+            poll_interval=0.0,  # re-poll immediately; the server holds the request
+            timeout=50,  # long-poll window: getUpdates blocks server-side
+            # Only the update types this bot handles; subscribing to
+            # everything inflates every getUpdates payload for nothing
+            allowed_updates=[Update.MESSAGE, Update.CALLBACK_QUERY],
             drop_pending_updates=True  # This helps avoid conflicts
         )
     except KeyboardInterrupt:
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Email Notifications for Doctor Appointment Bot
+Sends appointment confirmation and reminder emails via SMTP
+"""
+
+import functools
+import os
+import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from string import Template
+
+
+# Compiled once per process in the shared registry; validate_email
+# runs just the matcher
+from patterns import EMAIL_RE as _EMAIL_RE
+from patterns import EMAIL_LINE_RE as _EMAIL_LINE_RE
+
+
+def validate_email(email):
+    """Validate an email address format."""
+    if not email or not isinstance(email, str):
+        return False
+    # Cheap rejects first: no '@' or over the RFC 5321 length limit
+    # never reaches the regex engine
+    if '@' not in email or len(email) > 254:
+        return False
+    return _EMAIL_RE.fullmatch(email) is not None
+
+
+def validate_emails_bulk(emails):
+    """Validate many addresses in one regex pass. Returns a bool per input."""
+    # The same cheap rejects as validate_email run first, so the two
+    # validators can never disagree on an address; the survivors share
+    # one newline-joined scan, which amortizes the C transition across
+    # the batch instead of paying a matcher call per address
+    ok = [isinstance(email, str) and '@' in email and len(email) <= 254
+          for email in emails]
+    candidates = [email for email, good in zip(emails, ok) if good]
+    matched = set(_EMAIL_LINE_RE.findall('\n'.join(candidates)))
+    return [good and email in matched for email, good in zip(emails, ok)]
+
+
+@functools.lru_cache(maxsize=8)
+def get_smtp_settings(email_address):
+    """Return (server, ssl_port, starttls_port) for the sender's provider.
+
+    The sender address is fixed per process, so the domain sniffing runs
+    once and every later send is a cache hit.
+    """
+    domain = email_address.split('@')[1].lower()
+    if 'gmail' in domain:
+        return ('smtp.gmail.com', 465, 587)
+    elif 'outlook' in domain or 'hotmail' in domain or 'live' in domain:
+        return ('smtp-mail.outlook.com', 465, 587)
+    elif 'yahoo' in domain:
+        return ('smtp.mail.yahoo.com', 465, 587)
+    else:
+        # Default to Gmail settings
+        return ('smtp.gmail.com', 465, 587)
+
+
+# One SMTP connection is kept alive for the life of the process and shared
+# by every send, so the TLS handshake and AUTH are paid once instead of per
+# email. The lock matters because sends can come from different worker
+# threads; a dropped keep-alive is detected and reconnected once.
+_smtp_conn = None
+_smtp_lock = threading.Lock()
+
+# Sender credentials resolved once on first use rather than per send.
+# Not at import: the bot exports EMAIL_USER/EMAIL_PASSWORD from its
+# secure config after this module is loaded.
+_email_creds = None
+
+
+def _get_email_creds():
+    """Return (user, password), caching after the first successful read."""
+    global _email_creds
+    if _email_creds is None:
+        email_user = os.getenv('EMAIL_USER')
+        email_password = os.getenv('EMAIL_PASSWORD')
+        if email_user and email_password:
+            _email_creds = (email_user, email_password)
+    return _email_creds
+
+
+# Whichever transport connected last time is tried first on the next
+# connect, so a network where implicit SSL always fails stops paying
+# the doomed handshake before every STARTTLS fallback
+_preferred_transport = 'ssl'
+
+
+def _connect(email_user, email_password):
+    """Open and authenticate a new SMTP connection (SSL or STARTTLS)."""
+    global _preferred_transport
+    server, ssl_port, tls_port = get_smtp_settings(email_user)
+
+    def _via_ssl():
+        return smtplib.SMTP_SSL(server, ssl_port, timeout=10)
+
+    def _via_starttls():
+        conn = smtplib.SMTP(server, tls_port, timeout=10)
+        conn.starttls()
+        return conn
+
+    order = [('ssl', _via_ssl), ('starttls', _via_starttls)]
+    if _preferred_transport != 'ssl':
+        order.reverse()
+
+    name, opener = order[0]
+    try:
+        conn = opener()
+    except Exception:
+        name, opener = order[1]
+        conn = opener()
+
+    _preferred_transport = name
+    conn.login(email_user, email_password)
+    return conn
+
+
+def _build_message(from_email, to_email, subject, body, html_body=None):
+    """Assemble a plain-text (optionally multipart HTML) EmailMessage."""
+    msg = EmailMessage()
+    msg['From'] = from_email
+    msg['To'] = to_email
+    msg['Subject'] = subject
+    # base64 transfer encoding: one C-level b2a_base64 pass over the
+    # body instead of quoted-printable's per-byte scan in Python
+    msg.set_content(body, cte='base64')
+    if html_body:
+        msg.add_alternative(html_body, subtype='html', cte='base64')
+    return msg
+
+
+def send_email_notification(to_email, subject, body, html_body=None):
+    """Send an email notification. Returns True on success."""
+    global _smtp_conn
+
+    creds = _get_email_creds()
+    if creds is None:
+        print("❌ Email credentials not configured (EMAIL_USER / EMAIL_PASSWORD)")
+        return False
+    email_user, email_password = creds
+
+    if not validate_email(to_email):
+        print(f"❌ Invalid recipient email address: {to_email}")
+        return False
+
+    msg = _build_message(email_user, to_email, subject, body, html_body)
+
+    with _smtp_lock:
+        try:
+            if _smtp_conn is None:
+                _smtp_conn = _connect(email_user, email_password)
+            try:
+                _smtp_conn.send_message(msg)
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+                # Stale keep-alive: reconnect once and retry
+                _smtp_conn = _connect(email_user, email_password)
+                _smtp_conn.send_message(msg)
+            print(f"✅ Email sent to {to_email}")
+            return True
+        except Exception as e:
+            print(f"❌ Error sending email to {to_email}: {e}")
+            _smtp_conn = None
+            return False
+
+
+def send_bulk(messages):
+    """Send many emails over one SMTP session. Returns a bool per message.
+
+    Each item is (to_email, subject, body) or (to_email, subject, body,
+    html_body). The whole batch shares one connection, so N reminders
+    pay one TLS handshake and AUTH instead of N.
+    """
+    global _smtp_conn
+
+    messages = list(messages)
+    creds = _get_email_creds()
+    if creds is None:
+        print("❌ Email credentials not configured (EMAIL_USER / EMAIL_PASSWORD)")
+        return [False] * len(messages)
+    email_user, email_password = creds
+
+    results = []
+    with _smtp_lock:
+        for to_email, subject, body, *rest in messages:
+            if not validate_email(to_email):
+                print(f"❌ Invalid recipient email address: {to_email}")
+                results.append(False)
+                continue
+            msg = _build_message(email_user, to_email, subject, body,
+                                 rest[0] if rest else None)
+            try:
+                if _smtp_conn is None:
+                    _smtp_conn = _connect(email_user, email_password)
+                try:
+                    _smtp_conn.send_message(msg)
+                except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError):
+                    # Stale keep-alive: reconnect once and retry
+                    _smtp_conn = _connect(email_user, email_password)
+                    _smtp_conn.send_message(msg)
+                print(f"✅ Email sent to {to_email}")
+                results.append(True)
+            except Exception as e:
+                print(f"❌ Error sending email to {to_email}: {e}")
+                _smtp_conn = None
+                results.append(False)
+    return results
+
+
+# Bodies are tokenized into Templates once at import; each send is a
+# single substitution pass instead of re-rendering multi-kilobyte
+# literals field by field
+_CONFIRM_TEXT_TMPL = Template("""
+Dear $patient_name,
+
+Your appointment has been confirmed!
+
+Appointment Details:
+- Appointment ID: $appointment_id
+- Doctor: $doctor_name
+- Specialization: $doctor_specialization
+- Date: $preferred_date
+- Time: $preferred_time
+- Consultation Fee: $doctor_fees
+- Chief Complaint: $chief_complaint
+
+Next Steps:
+1. Please arrive 15 minutes before your appointment
+2. Bring a valid ID and insurance card
+3. Save your appointment ID for your records
+
+Need to modify or cancel? Contact us at +1 (555) 123-4567
+
+Thank you for choosing our clinic!
+
+Best regards,
+Doctor Appointment Bot
+""")
+
+_CONFIRM_HTML_TMPL = Template("""
+<!DOCTYPE html>
+<html>
+<body style="font-family: Arial, sans-serif; color: #333;">
+  <div style="max-width: 600px; margin: 0 auto; padding: 20px;">
+    <h2 style="color: #2e7d32;">✅ Appointment Confirmed!</h2>
+    <p>Dear <b>$patient_name</b>,</p>
+    <p>Your appointment has been confirmed. Here are the details:</p>
+    <table style="border-collapse: collapse; width: 100%;">
+      <tr><td style="padding: 6px; border: 1px solid #ddd;"><b>Appointment ID</b></td>
+          <td style="padding: 6px; border: 1px solid #ddd;">$appointment_id</td></tr>
+      <tr><td style="padding: 6px; border: 1px solid #ddd;"><b>Doctor</b></td>
+          <td style="padding: 6px; border: 1px solid #ddd;">$doctor_name</td></tr>
+      <tr><td style="padding: 6px; border: 1px solid #ddd;"><b>Specialization</b></td>
+          <td style="padding: 6px; border: 1px solid #ddd;">$doctor_specialization</td></tr>
+      <tr><td style="padding: 6px; border: 1px solid #ddd;"><b>Date</b></td>
+          <td style="padding: 6px; border: 1px solid #ddd;">$preferred_date</td></tr>
+      <tr><td style="padding: 6px; border: 1px solid #ddd;"><b>Time</b></td>
+          <td style="padding: 6px; border: 1px solid #ddd;">$preferred_time</td></tr>
+      <tr><td style="padding: 6px; border: 1px solid #ddd;"><b>Consultation Fee</b></td>
+          <td style="padding: 6px; border: 1px solid #ddd;">$doctor_fees</td></tr>
+    </table>
+    <h3>📋 Next Steps</h3>
+    <ol>
+      <li>Please arrive 15 minutes before your appointment</li>
+      <li>Bring a valid ID and insurance card</li>
+      <li>Save your appointment ID for your records</li>
+    </ol>
+    <p>Need to modify or cancel? Contact us at <b>+1 (555) 123-4567</b></p>
+    <p>Thank you for choosing our clinic! 🏥</p>
+  </div>
+</body>
+</html>
+""")
+
+_REMINDER_TEXT_TMPL = Template("""
+Dear $patient_name,
+
+This is a friendly reminder about your upcoming appointment:
+
+- Doctor: $doctor_name
+- Date: $preferred_date
+- Time: $preferred_time
+
+Please arrive 15 minutes early. See you soon!
+
+Best regards,
+Doctor Appointment Bot
+""")
+
+_TMPL_DEFAULTS = {
+    'patient_name': 'Patient', 'appointment_id': 'N/A', 'doctor_name': 'N/A',
+    'doctor_specialization': 'N/A', 'doctor_fees': 'N/A', 'chief_complaint': 'N/A',
+    'preferred_date': 'N/A', 'preferred_time': 'N/A',
+}
+
+
+def _template_vars(appointment_data):
+    """Merge appointment fields over the template defaults."""
+    merged = dict(_TMPL_DEFAULTS)
+    for key in _TMPL_DEFAULTS:
+        value = appointment_data.get(key)
+        if value:
+            merged[key] = value
+    return merged
+
+
+def send_appointment_confirmation(appointment_data):
+    """Send a confirmation email for a booked appointment."""
+    to_email = appointment_data.get('patient_email', '')
+    subject = f"✅ Appointment Confirmed - {appointment_data.get('appointment_id', 'N/A')}"
+
+    tmpl_vars = _template_vars(appointment_data)
+    body = _CONFIRM_TEXT_TMPL.substitute(tmpl_vars)
+    html_body = _CONFIRM_HTML_TMPL.substitute(tmpl_vars)
+    return send_email_notification(to_email, subject, body, html_body)
+
+
+# Sends (and their SSL/STARTTLS retries) run on this bounded pool so a
+# caller can hand off an email and reply to the user immediately; the
+# shared-connection lock serializes the actual wire traffic
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="smtp")
+
+
+def send_email_notification_async(to_email, subject, body, html_body=None):
+    """Queue an email send on the worker pool. Returns a Future."""
+    return _executor.submit(send_email_notification, to_email, subject, body, html_body)
+
+
+def send_appointment_confirmation_async(appointment_data):
+    """Queue a confirmation email on the worker pool. Returns a Future."""
+    return _executor.submit(send_appointment_confirmation, appointment_data)
+
+
+def build_appointment_reminder(appointment_data):
+    """Build a (to_email, subject, body) reminder tuple for send_bulk."""
+    to_email = appointment_data.get('patient_email', '')
+    subject = f"⏰ Appointment Reminder - {appointment_data.get('appointment_id', 'N/A')}"
+    body = _REMINDER_TEXT_TMPL.substitute(_template_vars(appointment_data))
+    return (to_email, subject, body)
+
+
+def send_appointment_reminder(appointment_data):
+    """Send a reminder email for an upcoming appointment."""
+    to_email, subject, body = build_appointment_reminder(appointment_data)
+    return send_email_notification(to_email, subject, body)
+
+
+if __name__ == "__main__":
+    print("📧 Email Notifications Module")
+    print(f"Email validation test: {validate_email('test@example.com')}")
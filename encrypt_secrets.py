@@ -5,17 +5,35 @@ Encrypts sensitive data like API keys, tokens, and credentials
 """
 
 import base64
+import hashlib
 import os
 import json
+import threading
 from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 import getpass
 
 
 class SecureDataManager:
     """Handles encryption and decryption of sensitive data"""
-    
+
+    # Managers memoized by a salted digest of the password: repeated
+    # config loads reuse the derived key instead of re-running the
+    # 100,000-iteration KDF each time
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    @classmethod
+    def from_cached(cls, master_password: str = None):
+        """Return a shared manager for this password, deriving the key once"""
+        if master_password is None:
+            master_password = getpass.getpass("Enter master password for encryption: ")
+        cache_key = hashlib.sha256(b'manager:' + master_password.encode()).hexdigest()
+        with cls._instances_lock:
+            manager = cls._instances.get(cache_key)
+            if manager is None:
+                manager = cls._instances[cache_key] = cls(master_password)
+        return manager
+
     def __init__(self, master_password: str = None):
         if master_password is None:
             master_password = getpass.getpass("Enter master password for encryption: ")
@@ -28,44 +46,43 @@ class SecureDataManager:
         """Generate encryption key from master password"""
         password_bytes = password.encode()
         salt = b'salt_doctor_appointment_bot_2025'  # Fixed salt for consistency
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password_bytes))
-        return key
+        # hashlib dispatches straight to OpenSSL's PBKDF2, which uses the
+        # CPU's SHA extensions where available — same derived key as the
+        # cryptography.hazmat wrapper, several times faster
+        derived = hashlib.pbkdf2_hmac('sha256', password_bytes, salt, 100000, dklen=32)
+        return base64.urlsafe_b64encode(derived)
     
     def encrypt_data(self, data: str) -> str:
         """Encrypt sensitive data"""
-        encrypted_data = self.cipher.encrypt(data.encode())
-        return base64.urlsafe_b64encode(encrypted_data).decode()
+        # Fernet tokens are already URL-safe base64 ASCII, so they are
+        # stored directly; the old extra b64 layer doubled the encoded
+        # size and added an encode/decode pass per value
+        return self.cipher.encrypt(data.encode()).decode('ascii')
     
     def decrypt_data(self, encrypted_data: str) -> str:
         """Decrypt sensitive data"""
-        encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
-        decrypted_data = self.cipher.decrypt(encrypted_bytes)
-        return decrypted_data.decode()
+        try:
+            return self.cipher.decrypt(encrypted_data.encode('ascii')).decode()
+        except Exception:
+            # Legacy values carry an extra base64 wrapping around the token
+            encrypted_bytes = base64.urlsafe_b64decode(encrypted_data.encode())
+            return self.cipher.decrypt(encrypted_bytes).decode()
     
     def encrypt_dict(self, data_dict: dict) -> dict:
         """Encrypt all values in a dictionary"""
-        encrypted_dict = {}
-        for key, value in data_dict.items():
-            if isinstance(value, str):
-                encrypted_dict[key] = self.encrypt_data(value)
-            else:
-                encrypted_dict[key] = value
-        return encrypted_dict
+        return {
+            key: self.encrypt_data(value) if isinstance(value, str) else value
+            for key, value in data_dict.items()
+        }
     
     def decrypt_dict(self, encrypted_dict: dict) -> dict:
         """Decrypt all values in a dictionary"""
         decrypted_dict = {}
         for key, value in encrypted_dict.items():
-            if isinstance(value, str) and key in ['TELEGRAM_BOT_TOKEN', 'GOOGLE_CREDENTIALS', 'GOOGLE_SHEETS_ID']:
+            if isinstance(value, str) and key in ('TELEGRAM_BOT_TOKEN', 'GOOGLE_CREDENTIALS', 'GOOGLE_SHEETS_ID'):
                 try:
                     decrypted_dict[key] = self.decrypt_data(value)
-                except:
+                except Exception:
                     decrypted_dict[key] = value  # If decryption fails, keep original
             else:
                 decrypted_dict[key] = value
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Google Calendar Integration for Doctor Appointment Bot
+Creates calendar events for confirmed appointments
+"""
+
+import asyncio
+import os
+import logging
+import threading
+from datetime import datetime, timedelta
+
+# orjson parses the service-account blob a few times faster than the
+# stdlib; fall back silently when it is not installed
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build
+
+logger = logging.getLogger(__name__)
+
+CALENDAR_SCOPES = ['https://www.googleapis.com/auth/calendar']
+
+# Credentials are parsed once per process: the GOOGLE_CREDENTIALS JSON
+# (a ~5 KB service-account key) and its RSA key load are not repaid on
+# service rebuilds. Lazy rather than at import because the bot exports
+# the env vars from its secure config after this module is imported.
+_creds = None
+_creds_lock = threading.Lock()
+
+
+def _get_credentials():
+    """Return the shared service-account Credentials, parsing them once."""
+    global _creds
+    if _creds is None:
+        with _creds_lock:
+            if _creds is None:
+                # Another module may already have parsed the env var;
+                # reuse its dict instead of decoding the JSON again
+                import secure_loader
+                creds_dict = secure_loader._parsed_google_creds
+                google_creds = os.getenv('GOOGLE_CREDENTIALS')
+                if creds_dict is not None:
+                    _creds = Credentials.from_service_account_info(
+                        creds_dict, scopes=CALENDAR_SCOPES)
+                elif google_creds:
+                    creds_dict = _json.loads(google_creds)
+                    secure_loader._parsed_google_creds = creds_dict
+                    _creds = Credentials.from_service_account_info(
+                        creds_dict, scopes=CALENDAR_SCOPES)
+                else:
+                    creds_file = os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json')
+                    _creds = Credentials.from_service_account_file(
+                        creds_file, scopes=CALENDAR_SCOPES)
+    return _creds
+
+
+def create_event_service():
+    """Build a Google Calendar API service with service-account credentials."""
+    # cache_discovery / static_discovery off: no discovery-doc file cache
+    # I/O and no 200 KB discovery JSON fetch+parse per build
+    return build('calendar', 'v3', credentials=_get_credentials(),
+                 cache_discovery=False, static_discovery=False)
+
+
+# The service (discovery parse + HTTP client) is built once per process
+# and shared; the lock keeps concurrent first calls from racing
+_service = None
+_service_lock = threading.Lock()
+
+
+def _get_service():
+    """Return the shared Calendar service, building it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = create_event_service()
+    return _service
+
+
+# Canonical 'YYYY-MM-DDTHH:MM:SS' strings skip datetime construction
+# entirely in build_event_body
+from patterns import ISO_DT_RE as _ISO_DT_RE
+
+# Shared by every event body instead of re-allocating the nested dicts
+# per call; treated as read-only
+_DEFAULT_REMINDERS = {
+    'useDefault': False,
+    'overrides': [
+        {'method': 'email', 'minutes': 24 * 60},
+        {'method': 'popup', 'minutes': 30},
+    ],
+}
+
+
+def _parse_start_datetime(start_datetime):
+    """Parse a start datetime from the formats the bot produces.
+
+    fromisoformat covers everything the bot emits in one C call and is
+    far cheaper than strptime; a bare date gets a default 10:00 slot,
+    and strptime remains only as the last resort for odd inputs.
+    """
+    if isinstance(start_datetime, datetime):
+        return start_datetime
+    s = start_datetime
+    # The bare-date check must come first: fromisoformat parses
+    # 'YYYY-MM-DD' too, but to midnight rather than the default slot
+    if len(s) == 10 and s[4] == '-' and s[7] == '-':
+        return datetime(int(s[:4]), int(s[5:7]), int(s[8:10]), 10, 0)
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        pass
+    for fmt in ('%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M'):
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized datetime format: {start_datetime!r}")
+
+
+def build_event_body(title, description, start_datetime, attendees=None, duration_minutes=60):
+    """Build an events().insert request body for one appointment."""
+    start_str = None
+    if isinstance(start_datetime, str) and _ISO_DT_RE.match(start_datetime):
+        # Fast path: the string already is the isoformat the API wants,
+        # so the end time is computed by minute arithmetic on its time
+        # fields — no datetime construction, timedelta add or isoformat
+        total = (int(start_datetime[11:13]) * 60
+                 + int(start_datetime[14:16]) + duration_minutes)
+        if total < 1440:  # end stays on the same day
+            start_str = start_datetime
+            end_str = '%s%02d:%02d%s' % (start_datetime[:11], total // 60,
+                                         total % 60, start_datetime[16:])
+    if start_str is None:
+        start = _parse_start_datetime(start_datetime)
+        end = start + timedelta(minutes=duration_minutes)
+        start_str = start.isoformat()
+        end_str = end.isoformat()
+
+    event_body = {
+        'summary': title,
+        'description': description,
+        'location': '123 Health Street, Medical District, City, State 12345',
+        'start': {'dateTime': start_str, 'timeZone': 'UTC'},
+        'end': {'dateTime': end_str, 'timeZone': 'UTC'},
+        'reminders': _DEFAULT_REMINDERS,
+    }
+    if attendees:
+        event_body['attendees'] = [{'email': email} for email in attendees]
+    return event_body
+
+
+# Decided once on first use (not at import — the bot exports its env
+# vars after this module loads). Deployments without credentials then
+# skip event creation with one boolean check instead of failing through
+# the whole build-service call chain per booking.
+_calendar_disabled = None
+
+
+def _calendar_unavailable():
+    """Return True when no Google credentials are configured, probing once."""
+    global _calendar_disabled
+    if _calendar_disabled is None:
+        _calendar_disabled = (
+            'GOOGLE_CREDENTIALS' not in os.environ
+            and not os.path.exists(os.getenv('GOOGLE_CREDENTIALS_FILE', 'credentials.json'))
+        )
+        if _calendar_disabled:
+            logger.warning("Calendar integration disabled: no Google credentials configured")
+    return _calendar_disabled
+
+
+def create_calendar_event(title, description, start_datetime, attendees=None, duration_minutes=60):
+    """Create a calendar event. Returns the event dict or None on failure."""
+    if _calendar_unavailable():
+        return None
+    try:
+        service = _get_service()
+        event_body = build_event_body(title, description, start_datetime,
+                                      attendees, duration_minutes)
+        # Only ask Google to fan out invitation emails when there is
+        # someone to invite; sendUpdates='all' otherwise lengthens the
+        # API call for nothing
+        send_updates = 'all' if attendees else 'none'
+        event = service.events().insert(calendarId='primary', body=event_body,
+                                        sendUpdates=send_updates).execute()
+        # Lazy %-formatting: the link is only rendered if INFO is enabled
+        logger.info("Event created: %s", event.get('htmlLink'))
+        return event
+    except Exception as e:
+        logger.error("Error creating calendar event: %s", e)
+        return None
+
+
+async def create_calendar_event_async(title, description, start_datetime,
+                                       attendees=None, duration_minutes=60):
+    """Create a calendar event without blocking the event loop.
+
+    The insert is a full HTTPS round-trip, so it runs on a worker
+    thread; concurrent bookings overlap instead of serializing behind
+    one another.
+    """
+    return await asyncio.to_thread(
+        create_calendar_event, title, description, start_datetime,
+        attendees, duration_minutes)
+
+
+def create_calendar_events(event_bodies):
+    """Create several events in one batched HTTP request.
+
+    Collapses N insert round-trips into a single multipart request.
+    Returns the created event dicts in input order, None where an
+    individual insert failed.
+    """
+    results = [None] * len(event_bodies)
+    if _calendar_unavailable():
+        return results
+    service = _get_service()
+
+    def _make_callback(index):
+        def _on_done(request_id, response, exception):
+            if exception is not None:
+                logger.error("Error creating calendar event #%d: %s", index + 1, exception)
+            else:
+                results[index] = response
+        return _on_done
+
+    batch = service.new_batch_http_request()
+    for i, event_body in enumerate(event_bodies):
+        send_updates = 'all' if event_body.get('attendees') else 'none'
+        batch.add(service.events().insert(calendarId='primary', body=event_body,
+                                          sendUpdates=send_updates),
+                  callback=_make_callback(i))
+
+    try:
+        batch.execute()
+    except Exception as e:
+        logger.error("Error executing calendar batch: %s", e)
+        return results
+
+    created = sum(result is not None for result in results)
+    logger.info("Calendar batch complete: %d/%d events created", created, len(event_bodies))
+    return results
+
+
+if __name__ == "__main__":
+    print("📅 Google Calendar Integration Module")
+    if os.getenv('GOOGLE_CREDENTIALS'):
+        print("✅ GOOGLE_CREDENTIALS found")
+    else:
+        print("❌ GOOGLE_CREDENTIALS not set")
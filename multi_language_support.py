@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Multi-Language Support for Doctor Appointment Bot
+Provides translations and per-user language preferences
+"""
+
+import functools
+import os
+import re
+
+# orjson loads and dumps the preferences file a few times faster than
+# the stdlib; fall back silently when it is not installed
+try:
+    import orjson as _json
+
+    def _dumps(obj):
+        return _json.dumps(obj, option=_json.OPT_INDENT_2)
+except ImportError:
+    import json as _json
+
+    def _dumps(obj):
+        return _json.dumps(obj, ensure_ascii=False, indent=2).encode()
+
+
+# One compiled scan classifies the script: the regex engine walks the
+# text once in C instead of re-scanning it per alphabet in Python.
+# Accents shared between languages sit in the set they most often
+# signal; plain-ASCII text falls through to the word heuristics.
+_SCRIPT_RE = re.compile(
+    '(?P<hi>[ऀ-ॿ])'
+    '|(?P<es>[ñ¿¡áíóú])'
+    '|(?P<fr>[àâçèêëîïôùûü])'
+)
+
+_ES_WORDS = frozenset({
+    'hola', 'gracias', 'buenos', 'días', 'cita', 'médico', 'doctor',
+    'ayuda', 'mundo', 'por', 'favor', 'adiós', 'señor', 'señora',
+})
+_FR_WORDS = frozenset({
+    'bonjour', 'merci', 'monde', 'rendez-vous', 'aide', 'docteur',
+    'salut', 'oui', 'au revoir', 'madame', 'monsieur',
+})
+
+# Built once: the menu rows and the selection→code map are constants,
+# not worth re-allocating per keyboard event
+_LANGUAGE_MENU = (
+    ('🇺🇸 English', '🇪🇸 Español'),
+    ('🇫🇷 Français', '🇮🇳 हिंदी'),
+)
+_LANG_MAP = {
+    '🇺🇸 English': 'en',
+    '🇪🇸 Español': 'es',
+    '🇫🇷 Français': 'fr',
+    '🇮🇳 हिंदी': 'hi',
+}
+# Each flag is exactly two regional-indicator characters, so slicing
+# the first two identifies the selection without comparing full labels
+_FLAG_TO_CODE = {label[:2]: code for label, code in _LANG_MAP.items()}
+
+
+class MultiLanguageSupport:
+    """Translations and user language preferences for the bot."""
+
+    def __init__(self):
+        self.default_language = 'en'
+        self.supported_languages = ['en', 'es', 'fr', 'hi']
+        self.user_languages_file = 'user_languages.json'
+
+        # Preferences live in memory and are read on every message; the
+        # file is parsed once here and rewritten only when one changes
+        try:
+            with open(self.user_languages_file, 'rb') as f:
+                self._user_lang = _json.loads(f.read())
+        except (FileNotFoundError, ValueError):
+            self._user_lang = {}
+
+        self.translations = {
+            'en': {
+                'welcome_message': '🏥 Welcome to Doctor Appointment Bot, {}! I will help you book an appointment with our doctors.',
+                'book_appointment': '📅 Book Appointment',
+                'view_doctors': '👨‍⚕️ View Doctors',
+                'help': '❓ Help',
+                'contact': '📞 Contact',
+                'select_doctor': 'Please select a doctor:',
+                'enter_name': 'Please enter your full name:',
+                'appointment_confirmed': '🎉 Your appointment has been confirmed!',
+                'appointment_cancelled': '❌ Appointment booking cancelled.',
+                'thank_you': 'Thank you for choosing our clinic!',
+                'select_language': '🌍 Please select your language:',
+                'language_set': '✅ Language set to English',
+            },
+            'es': {
+                'welcome_message': '🏥 ¡Bienvenido al Bot de Citas Médicas, {}! Te ayudaré a reservar una cita con nuestros médicos.',
+                'book_appointment': '📅 Reservar Cita',
+                'view_doctors': '👨‍⚕️ Ver Médicos',
+                'help': '❓ Ayuda',
+                'contact': '📞 Contacto',
+                'select_doctor': 'Por favor seleccione un médico:',
+                'enter_name': 'Por favor ingrese su nombre completo:',
+                'appointment_confirmed': '🎉 ¡Su cita ha sido confirmada!',
+                'appointment_cancelled': '❌ Reserva de cita cancelada.',
+                'thank_you': '¡Gracias por elegir nuestra clínica!',
+                'select_language': '🌍 Por favor seleccione su idioma:',
+                'language_set': '✅ Idioma configurado a Español',
+            },
+            'fr': {
+                'welcome_message': '🏥 Bienvenue sur le Bot de Rendez-vous Médicaux, {} ! Je vous aiderai à prendre rendez-vous avec nos médecins.',
+                'book_appointment': '📅 Prendre Rendez-vous',
+                'view_doctors': '👨‍⚕️ Voir les Médecins',
+                'help': '❓ Aide',
+                'contact': '📞 Contact',
+                'select_doctor': 'Veuillez sélectionner un médecin :',
+                'enter_name': 'Veuillez entrer votre nom complet :',
+                'appointment_confirmed': '🎉 Votre rendez-vous a été confirmé !',
+                'appointment_cancelled': '❌ Réservation de rendez-vous annulée.',
+                'thank_you': 'Merci d\'avoir choisi notre clinique !',
+                'select_language': '🌍 Veuillez sélectionner votre langue :',
+                'language_set': '✅ Langue définie sur Français',
+            },
+            'hi': {
+                'welcome_message': '🏥 डॉक्टर अपॉइंटमेंट बॉट में आपका स्वागत है, {}! मैं आपको हमारे डॉक्टरों के साथ अपॉइंटमेंट बुक करने में मदद करूंगा।',
+                'book_appointment': '📅 अपॉइंटमेंट बुक करें',
+                'view_doctors': '👨‍⚕️ डॉक्टर देखें',
+                'help': '❓ सहायता',
+                'contact': '📞 संपर्क करें',
+                'select_doctor': 'कृपया एक डॉक्टर चुनें:',
+                'enter_name': 'कृपया अपना पूरा नाम दर्ज करें:',
+                'appointment_confirmed': '🎉 आपका अपॉइंटमेंट कन्फर्म हो गया है!',
+                'appointment_cancelled': '❌ अपॉइंटमेंट बुकिंग रद्द कर दी गई।',
+                'thank_you': 'हमारे क्लिनिक को चुनने के लिए धन्यवाद!',
+                'select_language': '🌍 कृपया अपनी भाषा चुनें:',
+                'language_set': '✅ भाषा हिंदी पर सेट की गई',
+            },
+        }
+
+        # Each language table is pre-merged over the default language,
+        # so get_text resolves any key with a single dict lookup instead
+        # of a per-call fallback chain
+        default_table = self.translations[self.default_language]
+        self._tables = {
+            lang: {**default_table, **table}
+            for lang, table in self.translations.items()
+        }
+
+        # The welcome template is fixed per language, so its '{}' split
+        # happens once here; the hot path is then two concatenations
+        # instead of a format-parser walk over the whole template
+        self._welcome_parts = {
+            lang: tuple(table['welcome_message'].split('{}', 1))
+            for lang, table in self._tables.items()
+        }
+
+        # Repeated (key, language, args) lookups — the same UI strings
+        # over and over — come straight out of this per-instance cache
+        self._cached_text = functools.lru_cache(maxsize=1024)(self._lookup_text)
+
+        # Detection likewise: recurring phrases skip the scan entirely
+        self._detect_cache = functools.lru_cache(maxsize=4096)(self._detect_impl)
+
+    def detect_language_from_text(self, text):
+        """Detect the language of a message from its script and words."""
+        return self._detect_cache(text)
+
+    def _detect_impl(self, text):
+        """Uncached detection (see detect_language_from_text)."""
+        if not text:
+            return self.default_language
+
+        match = _SCRIPT_RE.search(text)
+        if match:
+            return match.lastgroup
+
+        # Plain-ASCII text: fall back to common-word heuristics
+        words = set(text.lower().split())
+        if words & _ES_WORDS:
+            return 'es'
+        if words & _FR_WORDS:
+            return 'fr'
+        return self.default_language
+
+    def get_text(self, key, language=None, *args):
+        """Get a translated text, falling back to the default language."""
+        return self._cached_text(key, language, args)
+
+    def _lookup_text(self, key, language, args):
+        """Uncached translation lookup (see get_text)."""
+        if key == 'welcome_message' and len(args) == 1:
+            parts = self._welcome_parts.get(language)
+            if parts is None:
+                parts = self._welcome_parts[self.default_language]
+            prefix, suffix = parts
+            return prefix + str(args[0]) + suffix
+
+        table = self._tables.get(language)
+        if table is None:
+            table = self._tables[self.default_language]
+
+        text = table.get(key, key)
+
+        # Plain texts skip the format parser entirely
+        if args and '{' in text:
+            try:
+                return text.format(*args)
+            except Exception:
+                return text
+        return text
+
+    def save_user_language(self, user_id, language):
+        """Persist a user's language preference (write-through)."""
+        if language not in self.supported_languages:
+            return False
+        self._user_lang[str(user_id)] = language
+        try:
+            # Write to a temp file and rename so a crash mid-dump never
+            # leaves a truncated preferences file behind
+            tmp_path = self.user_languages_file + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(_dumps(self._user_lang))
+            os.replace(tmp_path, self.user_languages_file)
+            return True
+        except Exception as e:
+            print(f"❌ Error saving user language: {e}")
+            return False
+
+    def get_user_language(self, user_id):
+        """Get a user's saved language preference."""
+        return self._user_lang.get(str(user_id), self.default_language)
+
+    def get_language_menu(self):
+        """Get the language selection keyboard rows."""
+        return _LANGUAGE_MENU
+
+    def set_user_language_from_selection(self, selection):
+        """Convert a language menu selection to its language code."""
+        code = _FLAG_TO_CODE.get(selection[:2]) if selection else None
+        if code is not None:
+            return code
+        # Selections without a known flag prefix (e.g. relabeled menus)
+        return _LANG_MAP.get(selection, self.default_language)
+
+
+if __name__ == "__main__":
+    ml = MultiLanguageSupport()
+    print("🌍 Multi-Language Support Module")
+    print(f"Supported languages: {ml.supported_languages}")
+    print(f"Detection test: {ml.detect_language_from_text('नमस्ते')}")
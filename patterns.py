@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Shared compiled regex patterns
+One compile per process for the patterns used across modules
+"""
+
+import re
+
+# re.ASCII keeps the character classes on the fast ASCII-only C path;
+# none of these patterns need Unicode class semantics
+
+# A single full email address
+EMAIL_RE = re.compile(r'^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$', re.ASCII)
+
+# One email address per line, for classifying a batch in one scan
+EMAIL_LINE_RE = re.compile(
+    r'^[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}$', re.ASCII | re.M)
+
+# Canonical 'YYYY-MM-DDTHH:MM:SS' datetime string
+ISO_DT_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}$', re.ASCII)
@@ -6,51 +6,108 @@ Loads and decrypts sensitive configuration data for the doctor appointment bot
 
 import os
 import base64
-import json
+import functools
+import re
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
+# Marker for the AES-GCM file format; files without it are legacy
+# Fernet blobs and take the old decrypt path
+_GCM_PREFIX = 'gcm1:'
+
+# KEY=value lines, skipping comments and stripping whitespace; one
+# compiled multiline scan replaces the per-line split/strip loops that
+# were duplicated across both .env parsers
+_ENV_RE = re.compile(r'^(?!\s*#)\s*([^=\s]+)\s*=\s*(.*?)\s*$', re.M)
+
+
+@functools.lru_cache(maxsize=4)
+def _derive_key(password):
+    """Derive the raw 32-byte key for a master password (memoized).
+
+    The password and salt are process constants, so the 100,000 PBKDF2
+    iterations run once instead of once per decrypted file.
+    """
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=b'salt_doctor_appointment_bot_2025',
+        iterations=100000,
+    )
+    return kdf.derive(password.encode())
+
 class SecureConfigLoader:
     """Loads encrypted configuration securely"""
     
     def __init__(self, master_password="SecureDoctor2025!@#"):
         self.master_password = master_password
+        self._cipher = None
+        self._aesgcm = None
+        self._loaded = False
         self.config = {}
-        self.load_config()
+    
+    def _ensure_loaded(self):
+        """Load configuration on first access"""
+        # Deferred from __init__ so importing (or constructing) the
+        # loader costs nothing; the PBKDF2 derivation and file decrypts
+        # run only when a value is actually requested
+        if not self._loaded:
+            self.load_config()
     
     def _generate_key_from_password(self, password):
         """Generate encryption key from master password"""
-        password_bytes = password.encode()
-        salt = b'salt_doctor_appointment_bot_2025'
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(password_bytes))
-        return key
+        return base64.urlsafe_b64encode(_derive_key(password))
+    
+    def _get_cipher(self):
+        """Return the shared legacy Fernet cipher, building it on first use"""
+        if self._cipher is None:
+            self._cipher = Fernet(base64.urlsafe_b64encode(_derive_key(self.master_password)))
+        return self._cipher
+    
+    def _get_aesgcm(self):
+        """Return the shared AES-GCM cipher, building it on first use"""
+        if self._aesgcm is None:
+            self._aesgcm = AESGCM(_derive_key(self.master_password))
+        return self._aesgcm
+    
+    def encrypt_file(self, content, output_path):
+        """Encrypt config content to an AES-GCM file decrypt_file can read"""
+        nonce = os.urandom(12)
+        ciphertext = self._get_aesgcm().encrypt(nonce, content.encode(), None)
+        with open(output_path, 'w') as f:
+            f.write(_GCM_PREFIX + base64.urlsafe_b64encode(nonce + ciphertext).decode())
     
     def decrypt_file(self, encrypted_file_path):
         """Decrypt an encrypted file"""
         try:
-            key = self._generate_key_from_password(self.master_password)
-            cipher = Fernet(key)
-            
             with open(encrypted_file_path, 'r') as f:
                 encrypted_b64 = f.read()
+            return self._decrypt_content(encrypted_b64)
+        except Exception as e:
+            print(f"❌ Failed to decrypt {encrypted_file_path}: {e}")
+            return None
+    
+    def _decrypt_content(self, encrypted_b64):
+        """Decrypt already-read file content"""
+        try:
+            if encrypted_b64.startswith(_GCM_PREFIX):
+                # AES-GCM: authenticated decryption in a single pass,
+                # 12-byte nonce prefixed to the ciphertext
+                blob = base64.urlsafe_b64decode(encrypted_b64[len(_GCM_PREFIX):].encode())
+                return self._get_aesgcm().decrypt(blob[:12], blob[12:], None).decode()
             
+            # Legacy Fernet blobs (CBC + separate HMAC pass)
             encrypted_data = base64.urlsafe_b64decode(encrypted_b64.encode())
-            decrypted_data = cipher.decrypt(encrypted_data)
-            
-            return decrypted_data.decode()
+            return self._get_cipher().decrypt(encrypted_data).decode()
         except Exception as e:
-            print(f"❌ Failed to decrypt {encrypted_file_path}: {e}")
+            print(f"❌ Failed to decrypt content: {e}")
             return None
     
     def load_config(self):
         """Load configuration from various sources in priority order"""
+        self._loaded = True
         
         # 1. Try to load from Railway/Production environment variables
         if self._load_from_env_vars():
@@ -95,23 +152,25 @@ class SecureConfigLoader:
     def _load_from_encrypted_files(self):
         """Load from encrypted configuration files"""
         try:
-            if not (os.path.exists('.env.encrypted') and os.path.exists('credentials.json.encrypted')):
+            # EAFP: open directly instead of stat-then-open, halving the
+            # filesystem calls on the startup path
+            try:
+                with open('.env.encrypted', 'r') as f:
+                    env_blob = f.read()
+                with open('credentials.json.encrypted', 'r') as f:
+                    creds_blob = f.read()
+            except FileNotFoundError:
                 return False
             
-            # Decrypt .env file
-            env_content = self.decrypt_file('.env.encrypted')
+            # Both files read; decrypt them with the shared cipher
+            env_content = self._decrypt_content(env_blob)
             if not env_content:
                 return False
             
             # Parse .env content
-            env_vars = {}
-            for line in env_content.strip().split('\n'):
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.split('=', 1)
-                    env_vars[key.strip()] = value.strip()
+            env_vars = dict(_ENV_RE.findall(env_content))
             
-            # Decrypt credentials.json
-            creds_content = self.decrypt_file('credentials.json.encrypted')
+            creds_content = self._decrypt_content(creds_blob)
             if not creds_content:
                 return False
             
@@ -131,26 +190,17 @@ class SecureConfigLoader:
     def _load_from_backup(self):
         """Load from backup files (development only)"""
         try:
-            env_path = '.sensitive_backup/.env'
-            creds_path = '.sensitive_backup/credentials.json'
-            
-            if not (os.path.exists(env_path) and os.path.exists(creds_path)):
+            # EAFP: open directly instead of stat-then-open
+            try:
+                with open('.sensitive_backup/.env', 'r') as f:
+                    env_content = f.read()
+                with open('.sensitive_backup/credentials.json', 'r') as f:
+                    creds_content = f.read()
+            except FileNotFoundError:
                 return False
             
-            # Read .env file
-            with open(env_path, 'r') as f:
-                env_content = f.read()
-            
             # Parse .env content
-            env_vars = {}
-            for line in env_content.strip().split('\n'):
-                if '=' in line and not line.startswith('#'):
-                    key, value = line.split('=', 1)
-                    env_vars[key.strip()] = value.strip()
-            
-            # Read credentials file
-            with open(creds_path, 'r') as f:
-                creds_content = f.read()
+            env_vars = dict(_ENV_RE.findall(env_content))
             
             self.config = {
                 'TELEGRAM_BOT_TOKEN': env_vars.get('TELEGRAM_BOT_TOKEN', ''),
@@ -166,12 +216,19 @@ class SecureConfigLoader:
     
     def get_config(self):
         """Get the loaded configuration"""
+        self._ensure_loaded()
         return self.config
     
     def get(self, key, default=None):
         """Get a specific configuration value"""
+        self._ensure_loaded()
         return self.config.get(key, default)
 
+# Parsed GOOGLE_CREDENTIALS dict, stashed by whoever parses the JSON
+# first (bot startup, test harness) so the sheets and calendar modules
+# can skip re-parsing the multi-KB env var
+_parsed_google_creds = None
+
 # Global instance
 _secure_config = None
 
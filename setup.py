@@ -6,6 +6,8 @@ Helps configure Google Sheets and Telegram Bot credentials
 
 import os
 import json
+import subprocess
+import sys
 from pathlib import Path
 
 def create_env_file():
@@ -79,7 +81,13 @@ def setup_google_credentials():
 def install_dependencies():
     """Install required Python packages"""
     print("\n📦 Installing dependencies...")
-    os.system("pip install -r requirements.txt")
+    # Direct exec (no shell fork) against this interpreter's pip;
+    # --no-compile skips .pyc generation, which dominates install time
+    # for the heavier packages and happens lazily on first import anyway
+    subprocess.run(
+        [sys.executable, "-m", "pip", "install", "--no-compile", "-r", "requirements.txt"],
+        check=True,
+    )
     print("✅ Dependencies installed!")
 
 def create_sample_sheet_structure():
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Email Setup Script for Doctor Appointment Bot
+Helps configure email credentials and sends a test email
+"""
+
+import os
+import getpass
+from datetime import datetime
+from string import Template
+
+from email_notifications import send_email_notification, validate_email
+
+# Tokenized once at import; each send splices in just the two values
+# instead of re-rendering the whole body
+_TEST_BODY_TMPL = Template("""
+Hello!
+
+This is a test email from the Doctor Appointment Bot.
+
+Configuration Details:
+- Email Address: $email
+- Time: $time
+
+If you received this email, your email notifications are working correctly!
+
+Best regards,
+Doctor Appointment Bot
+""")
+
+
+def setup_email_credentials():
+    """Configure email credentials and verify them with a test email"""
+    print("📧 Email Notification Setup")
+    print("=" * 50)
+
+    print("\n📝 Gmail App Password Setup:")
+    print("1. Go to your Google Account settings")
+    print("2. Enable 2-Step Verification if not already enabled")
+    print("3. Go to Security > App passwords")
+    print("4. Generate an app password for 'Mail'")
+    print("5. Use that 16-character password below (not your Gmail password)")
+
+    email_user = input("\nEnter your email address: ").strip()
+    if not validate_email(email_user):
+        print(f"❌ Invalid email address: {email_user}")
+        return False
+
+    email_password = getpass.getpass("Enter your email app password: ")
+    if not email_password:
+        print("❌ No password entered")
+        return False
+
+    os.environ['EMAIL_USER'] = email_user
+    os.environ['EMAIL_PASSWORD'] = email_password
+
+    print("\n📤 Sending test email...")
+    test_body = _TEST_BODY_TMPL.substitute(
+        email=email_user, time=datetime.now().isoformat(timespec='seconds'))
+
+    if send_email_notification(email_user, "🏥 Doctor Appointment Bot - Test Email", test_body):
+        print("✅ Test email sent successfully!")
+        print("\n💾 To make these credentials permanent, add to your .env file:")
+        print(f"   EMAIL_USER={email_user}")
+        print("   EMAIL_PASSWORD=<your app password>")
+        return True
+    else:
+        print("❌ Test email failed. Check your credentials and try again.")
+        return False
+
+
+if __name__ == "__main__":
+    try:
+        setup_email_credentials()
+    except KeyboardInterrupt:
+        print("\n\n❌ Setup cancelled by user.")
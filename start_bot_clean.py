@@ -4,32 +4,67 @@ Clean Bot Startup Script
 Ensures only one instance runs and handles conflicts gracefully
 """
 
+import fcntl
 import os
 import sys
-import subprocess
 import time
 import signal
 from doctor_appointment_bot import main
 
-def kill_existing_instances():
-    """Kill any existing bot instances."""
+PID_FILE = '/tmp/doctor_bot.pid'
+
+# Held open for the life of the process so the flock stays active
+_pid_file = None
+
+def acquire_instance_lock():
+    """Take the single-instance lock, evicting a stale/running instance."""
+    global _pid_file
+    fh = open(PID_FILE, 'a+')
     try:
-        # Kill any existing Python processes running the bot
-        subprocess.run(['pkill', '-f', 'doctor_appointment_bot.py'], 
-                       capture_output=True, check=False)
-        print("🧹 Cleaned up any existing bot instances")
-        time.sleep(2)  # Wait for cleanup
-    except Exception as e:
-        print(f"⚠️ Cleanup note: {e}")
+        # Uncontended case: the lock is free and this costs microseconds,
+        # no pkill fork and no fixed sleep
+        fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        # Another instance holds the lock; ask it to stop and wait only
+        # as long as it actually takes to exit
+        fh.seek(0)
+        try:
+            old_pid = int(fh.read().strip())
+        except ValueError:
+            old_pid = None
+
+        if old_pid:
+            print(f"🧹 Stopping existing bot instance (pid {old_pid})")
+            try:
+                os.kill(old_pid, signal.SIGTERM)
+                deadline = time.monotonic() + 10
+                while time.monotonic() < deadline:
+                    os.kill(old_pid, 0)  # raises once the process is gone
+                    time.sleep(0.1)
+            except ProcessLookupError:
+                pass
+
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            print("❌ Another bot instance is still running. Stop it and retry.")
+            sys.exit(1)
+
+    fh.seek(0)
+    fh.truncate()
+    fh.write(str(os.getpid()))
+    fh.flush()
+    _pid_file = fh
 
 def start_bot():
     """Start the bot with proper error handling."""
     print("🚀 Starting Doctor Appointment Bot...")
     print("=" * 50)
-    
-    # Kill existing instances first
-    kill_existing_instances()
-    
+
+    # Make sure we are the only instance before polling Telegram
+    acquire_instance_lock()
+
     try:
         # Start the bot
         main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Email and Calendar Integration Tests
+Smoke-tests the email and calendar features against the real services
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Shared sample appointment for both tests
+TEST_APPOINTMENT = {
+    'appointment_id': 'TEST-001',
+    'patient_name': 'Test Patient',
+    'patient_email': 'test.patient@example.com',
+    'doctor_name': 'Dr. Sarah Johnson',
+    'doctor_specialization': 'General Medicine',
+    'doctor_fees': '$100',
+    'chief_complaint': 'Integration test booking',
+    'preferred_date': '2025-09-05',
+    'preferred_time': '10:00',
+}
+
+
+def test_email_integration(enabled=True):
+    """Send a confirmation email for the sample appointment."""
+    lines = ["📧 Testing Email Integration..."]
+
+    if not enabled:
+        lines.append("   ⚠️ EMAIL_USER / EMAIL_PASSWORD not configured - skipping")
+        return False, lines
+
+    # Imported after the guard so a skipped test never pays for smtplib
+    from email_notifications import send_appointment_confirmation
+
+    try:
+        result = send_appointment_confirmation(TEST_APPOINTMENT)
+        if result:
+            lines.append("   ✅ Confirmation email sent successfully")
+        else:
+            lines.append("   ❌ Confirmation email failed (check credentials)")
+        return bool(result), lines
+    except Exception as e:
+        lines.append(f"   ❌ Email error: {e}")
+        return False, lines
+
+
+def test_calendar_integration(enabled=True):
+    """Create a calendar event for the sample appointment."""
+    lines = ["📅 Testing Calendar Integration..."]
+
+    if not enabled:
+        lines.append("   ⚠️ GOOGLE_CREDENTIALS not configured - skipping")
+        return False, lines
+
+    # Imported after the guard so a skipped test never pays for
+    # googleapiclient
+    from google_calendar_integration import create_calendar_event
+
+    try:
+        start_datetime = f"{TEST_APPOINTMENT['preferred_date']}T{TEST_APPOINTMENT['preferred_time']}:00"
+        event = create_calendar_event(
+            title=f"Test Appointment with {TEST_APPOINTMENT['doctor_name']}",
+            description=f"Patient: {TEST_APPOINTMENT['patient_name']}",
+            start_datetime=start_datetime,
+            attendees=[TEST_APPOINTMENT['patient_email']],
+            duration_minutes=30,
+        )
+        if event and event.get('id'):
+            lines.append(f"   ✅ Calendar event created: {event['id']}")
+            lines.append(f"   🔗 Link: {event.get('htmlLink', 'N/A')}")
+        else:
+            lines.append("   ❌ Failed to create calendar event")
+        return bool(event and event.get('id')), lines
+    except Exception as e:
+        lines.append(f"   ❌ Calendar error: {e}")
+        return False, lines
+
+
+def main():
+    print("🧪 EMAIL & CALENDAR INTEGRATION TESTS")
+    print("=" * 50)
+
+    # Capabilities checked once up front; the test functions take the
+    # verdict instead of each re-reading os.environ
+    caps = {
+        'email': bool(os.getenv('EMAIL_USER') and os.getenv('EMAIL_PASSWORD')),
+        'calendar': bool(os.getenv('GOOGLE_CREDENTIALS')),
+    }
+
+    # Both tests block on independent remote services, so they run
+    # concurrently; each collects its output and prints after the join
+    # so the reports never interleave
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        email_future = executor.submit(test_email_integration, caps['email'])
+        calendar_future = executor.submit(test_calendar_integration, caps['calendar'])
+        email_ok, email_lines = email_future.result()
+        calendar_ok, calendar_lines = calendar_future.result()
+
+    print('\n'.join(email_lines))
+    print()
+    print('\n'.join(calendar_lines))
+
+    print("\n" + "=" * 50)
+    print(f"📧 Email: {'✅ PASS' if email_ok else '❌ FAIL'}")
+    print(f"📅 Calendar: {'✅ PASS' if calendar_ok else '❌ FAIL'}")
+    return email_ok and calendar_ok
+
+
+if __name__ == "__main__":
+    main()
@@ -3,39 +3,102 @@
 Test script for Email, Calendar, and Language features
 """
 
+import functools
+import io
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Import the modules to test
-from email_notifications import send_email_notification, send_appointment_confirmation, validate_email
-from google_calendar_integration import create_calendar_event
-from multi_language_support import MultiLanguageSupport
+# Snapshot once: every later check is a plain dict probe instead of a
+# trip through the os.environ proxy
+_ENV = dict(os.environ)
+_has = _ENV.__contains__
 
-def test_email_features():
+# Import the modules to test; the calendar and language modules load
+# lazily inside the tests that need them, so running a single subtest
+# skips the other modules' import cost entirely
+from email_notifications import (send_email_notification, send_appointment_confirmation,
+                                 validate_emails_bulk)
+
+# Shared fallback so missing-dict defaults don't allocate a fresh {}
+_EMPTY = {}
+
+# Capability bits: computed once per run, tested with an integer AND
+_CAP_EMAIL = 1
+_CAP_CALENDAR = 2
+
+
+def _env_caps():
+    """Pack the credential checks into one capability bitmap."""
+    return (((_has('EMAIL_USER') and _has('EMAIL_PASSWORD')) << 0)
+            | (_has('GOOGLE_CREDENTIALS') << 1))
+
+
+# slots=True stores the fields in fixed offsets instead of a per-object
+# dict; frozen=True documents that the sample data never changes
+@dataclass(frozen=True, slots=True)
+class Appointment:
+    """Sample appointment used by the integration test."""
+    appointment_id: str
+    patient_name: str
+    patient_email: str
+    patient_phone: str
+    doctor_name: str
+    doctor_specialization: str
+    doctor_fees: str
+    preferred_date: str
+    preferred_time: str
+    chief_complaint: str
+    user_info: dict = field(default_factory=dict)
+
+
+def _short_error(e):
+    """Compact one-line error label: exception type plus trimmed detail."""
+    # args[0] skips the full str(e) rendering for multi-arg exceptions;
+    # !s:.40 truncates during formatting without an intermediate slice
+    detail = e.args[0] if e.args else ''
+    return f"Error: {type(e).__name__}: {detail!s:.40}"
+
+
+@functools.cache
+def _get_ml():
+    """Shared MultiLanguageSupport: translations and preferences load once."""
+    from multi_language_support import MultiLanguageSupport
+    return MultiLanguageSupport()
+
+def test_email_features(caps=None):
     """Test email notification features."""
-    print("🧪 Testing Email Features...")
-    print("-" * 40)
+    if caps is None:
+        caps = _env_caps()
+    # All output lands in one buffer and is flushed with a single
+    # write, so a parallel runner cannot interleave the lines
+    buf = io.StringIO()
+    w = functools.partial(print, file=buf)
+    w("🧪 Testing Email Features...")
+    w("-" * 40)
     
     # Test email validation
-    print("1. Testing email validation:")
+    w("1. Testing email validation:")
     valid_emails = ["test@example.com", "user.name@domain.co.uk", "test+tag@gmail.com"]
     invalid_emails = ["invalid", "@domain.com", "user@", "user space@domain.com"]
     
-    for email in valid_emails:
-        result = validate_email(email)
-        print(f"   ✅ {email}: {'Valid' if result else 'Invalid'}")
+    # One bulk call classifies every address in a single regex pass;
+    # the loop below only formats the results
+    all_emails = valid_emails + invalid_emails
+    results = validate_emails_bulk(all_emails)
     
-    for email in invalid_emails:
-        result = validate_email(email)
-        print(f"   ❌ {email}: {'Valid' if result else 'Invalid'}")
+    for email, result in zip(all_emails, results):
+        mark = '✅' if email in valid_emails else '❌'
+        w(f"   {mark} {email}: {'Valid' if result else 'Invalid'}")
     
     # Test appointment confirmation email (mock data)
-    print("\n2. Testing appointment confirmation email:")
+    w("\n2. Testing appointment confirmation email:")
     test_appointment = {
         'appointment_id': 'APT-TEST123',
         'patient_name': 'John Doe',
@@ -49,26 +112,34 @@ def test_email_features():
         'chief_complaint': 'Regular checkup'
     }
     
-    if os.getenv('EMAIL_USER') and os.getenv('EMAIL_PASSWORD'):
+    if caps & _CAP_EMAIL:
         try:
             result = send_appointment_confirmation(test_appointment)
-            print(f"   📧 Email test result: {'✅ Success' if result else '❌ Failed'}")
+            w(f"   📧 Email test result: {'✅ Success' if result else '❌ Failed'}")
         except Exception as e:
-            print(f"   📧 Email test error: {e}")
+            w(f"   📧 Email test error: {e}")
     else:
-        print("   📧 Email credentials not found - skipping email test")
+        w("   📧 Email credentials not found - skipping email test")
     
-    print()
+    w()
+    sys.stdout.write(buf.getvalue())
 
-def test_calendar_features():
+def test_calendar_features(caps=None):
     """Test Google Calendar integration features."""
-    print("🧪 Testing Calendar Features...")
-    print("-" * 40)
+    if caps is None:
+        caps = _env_caps()
+    # All output lands in one buffer and is flushed with a single
+    # write, so a parallel runner cannot interleave the lines
+    buf = io.StringIO()
+    w = functools.partial(print, file=buf)
+    w("🧪 Testing Calendar Features...")
+    w("-" * 40)
     
     # Test calendar event creation
-    print("1. Testing calendar event creation:")
+    w("1. Testing calendar event creation:")
     
-    if os.getenv('GOOGLE_CREDENTIALS'):
+    if caps & _CAP_CALENDAR:
+        from google_calendar_integration import create_calendar_event
         try:
             result = create_calendar_event(
                 title="Test Appointment",
@@ -79,28 +150,33 @@ def test_calendar_features():
             )
             
             if result and result.get('id'):
-                print(f"   📅 Calendar test: ✅ Success - Event ID: {result['id']}")
-                print(f"   📅 Event link: {result.get('htmlLink', 'N/A')}")
+                w(f"   📅 Calendar test: ✅ Success - Event ID: {result['id']}")
+                w(f"   📅 Event link: {result.get('htmlLink', 'N/A')}")
             else:
-                print(f"   📅 Calendar test: ❌ Failed - No event created")
+                w(f"   📅 Calendar test: ❌ Failed - No event created")
                 
         except Exception as e:
-            print(f"   📅 Calendar test error: {e}")
+            w(f"   📅 Calendar test error: {e}")
     else:
-        print("   📅 Google credentials not found - skipping calendar test")
+        w("   📅 Google credentials not found - skipping calendar test")
     
-    print()
+    w()
+    sys.stdout.write(buf.getvalue())
 
 def test_language_features():
     """Test multi-language support features."""
-    print("🧪 Testing Language Features...")
-    print("-" * 40)
+    # All output lands in one buffer and is flushed with a single
+    # write, so a parallel runner cannot interleave the lines
+    buf = io.StringIO()
+    w = functools.partial(print, file=buf)
+    w("🧪 Testing Language Features...")
+    w("-" * 40)
     
-    # Initialize multi-language support
-    ml = MultiLanguageSupport()
+    # Initialize multi-language support (shared across runs)
+    ml = _get_ml()
     
     # Test language detection
-    print("1. Testing language detection:")
+    w("1. Testing language detection:")
     test_texts = [
         ("Hello world", "en"),
         ("Hola mundo", "es"),
@@ -110,123 +186,145 @@ def test_language_features():
     
     for text, expected in test_texts:
         detected = ml.detect_language_from_text(text)
-        print(f"   '{text}' -> {detected} {'✅' if detected == expected else '❌'}")
+        w(f"   '{text}' -> {detected} {'✅' if detected == expected else '❌'}")
     
     # Test translations
-    print("\n2. Testing translations:")
+    w("\n2. Testing translations:")
     languages = ['en', 'es', 'fr', 'hi']
     test_key = 'welcome_message'
     
     for lang in languages:
         translation = ml.get_text(test_key, lang, 'Test User')
-        print(f"   {lang}: {translation[:50]}...")
+        w(f"   {lang}: {translation[:50]}...")
     
     # Test language menu
-    print("\n3. Testing language menu:")
+    w("\n3. Testing language menu:")
     menu = ml.get_language_menu()
     for row in menu:
-        print(f"   {row}")
+        w(f"   {row}")
     
     # Test language selection conversion
-    print("\n4. Testing language selection conversion:")
+    w("\n4. Testing language selection conversion:")
     selections = ['🇺🇸 English', '🇪🇸 Español', '🇫🇷 Français', '🇮🇳 हिंदी']
     for selection in selections:
         lang_code = ml.set_user_language_from_selection(selection)
-        print(f"   '{selection}' -> {lang_code}")
+        w(f"   '{selection}' -> {lang_code}")
     
     # Test saving and retrieving user language
-    print("\n5. Testing user language persistence:")
+    w("\n5. Testing user language persistence:")
     test_user_id = 12345
     test_language = 'es'
     
     save_result = ml.save_user_language(test_user_id, test_language)
     retrieved_language = ml.get_user_language(test_user_id)
     
-    print(f"   Save result: {'✅' if save_result else '❌'}")
-    print(f"   Retrieved language: {retrieved_language} {'✅' if retrieved_language == test_language else '❌'}")
+    w(f"   Save result: {'✅' if save_result else '❌'}")
+    w(f"   Retrieved language: {retrieved_language} {'✅' if retrieved_language == test_language else '❌'}")
     
-    print()
+    w()
+    sys.stdout.write(buf.getvalue())
 
-def test_integration():
+def test_integration(caps=None):
     """Test integration of all features."""
-    print("🧪 Testing Feature Integration...")
-    print("-" * 40)
+    if caps is None:
+        caps = _env_caps()
+    # All output lands in one buffer and is flushed with a single
+    # write, so a parallel runner cannot interleave the lines
+    buf = io.StringIO()
+    w = functools.partial(print, file=buf)
+    w("🧪 Testing Feature Integration...")
+    w("-" * 40)
     
     # Simulate appointment booking with all features
-    print("1. Simulating complete appointment booking:")
-    
-    # Mock appointment data
-    appointment_data = {
-        'appointment_id': 'APT-INTEGRATION-TEST',
-        'patient_name': 'Integration Test User',
-        'patient_email': 'integration@test.com',
-        'patient_phone': '+1 555-999-8888',
-        'doctor_name': 'Dr. Test Doctor',
-        'doctor_specialization': 'Test Specialty',
-        'doctor_fees': '$100',
-        'preferred_date': '2024-08-20',
-        'preferred_time': '14:00',
-        'chief_complaint': 'Integration testing',
-        'user_info': {
+    w("1. Simulating complete appointment booking:")
+    
+    # Mock appointment data; the email and calendar APIs keep their
+    # dict interface, so one asdict at the boundary covers both calls
+    appointment = Appointment(
+        appointment_id='APT-INTEGRATION-TEST',
+        patient_name='Integration Test User',
+        patient_email='integration@test.com',
+        patient_phone='+1 555-999-8888',
+        doctor_name='Dr. Test Doctor',
+        doctor_specialization='Test Specialty',
+        doctor_fees='$100',
+        preferred_date='2024-08-20',
+        preferred_time='14:00',
+        chief_complaint='Integration testing',
+        user_info={
             'language_code': 'en',
             'first_name': 'Test',
             'last_name': 'User'
         }
-    }
+    )
+    appointment_data = asdict(appointment)
+
+    # The f-strings below splice these fields in repeatedly; locals make
+    # each read a frame slot instead of a dataclass attribute lookup
+    patient_name = appointment.patient_name
+    patient_email = appointment.patient_email
+    doctor_name = appointment.doctor_name
+    preferred_date = appointment.preferred_date
+    preferred_time = appointment.preferred_time
+    chief_complaint = appointment.chief_complaint
     
     # Test email feature
     email_sent = False
     email_status = "Not Sent"
     try:
-        if os.getenv('EMAIL_USER') and os.getenv('EMAIL_PASSWORD'):
+        if caps & _CAP_EMAIL:
             email_sent = send_appointment_confirmation(appointment_data)
             email_status = "Sent" if email_sent else "Failed"
         else:
             email_status = "No Credentials"
     except Exception as e:
-        email_status = f"Error: {str(e)[:50]}"
+        email_status = _short_error(e)
     
-    print(f"   📧 Email Status: {email_status}")
+    w(f"   📧 Email Status: {email_status}")
     
     # Test calendar feature
     calendar_event_id = ""
     calendar_status = "Not Created"
     try:
-        if os.getenv('GOOGLE_CREDENTIALS'):
-            start_datetime_str = f"{appointment_data['preferred_date']}T{appointment_data['preferred_time']}:00"
+        if caps & _CAP_CALENDAR:
+            from google_calendar_integration import create_calendar_event
+            start_datetime_str = f"{preferred_date}T{preferred_time}:00"
             event_result = create_calendar_event(
-                title=f"Appointment with {appointment_data['doctor_name']}",
-                description=f"Patient: {appointment_data['patient_name']}\\nReason: {appointment_data['chief_complaint']}",
+                title=f"Appointment with {doctor_name}",
+                description=f"Patient: {patient_name}\\nReason: {chief_complaint}",
                 start_datetime=start_datetime_str,
-                attendees=[appointment_data['patient_email']],
+                attendees=[patient_email],
                 duration_minutes=30
             )
-            if event_result and event_result.get('id'):
-                calendar_event_id = event_result.get('id', '')
+            eid = event_result.get('id') if event_result else None
+            if eid:
+                calendar_event_id = eid
                 calendar_status = "Created Successfully"
             else:
                 calendar_status = "Failed to Create"
         else:
             calendar_status = "No Credentials"
     except Exception as e:
-        calendar_status = f"Error: {str(e)[:50]}"
+        calendar_status = _short_error(e)
     
-    print(f"   📅 Calendar Status: {calendar_status}")
-    print(f"   📅 Calendar Event ID: {calendar_event_id}")
+    w(f"   📅 Calendar Status: {calendar_status}")
+    w(f"   📅 Calendar Event ID: {calendar_event_id}")
     
     # Test language feature
-    user_language = appointment_data.get('user_info', {}).get('language_code', 'en')
-    print(f"   🌍 User Language: {user_language}")
+    ui = appointment.user_info or _EMPTY
+    user_language = ui.get('language_code', 'en')
+    w(f"   🌍 User Language: {user_language}")
     
     # Summary
-    print("\n2. Integration Summary:")
-    print(f"   📧 Email Sent: {'Yes' if email_sent else 'No'}")
-    print(f"   📧 Email Status: {email_status}")
-    print(f"   📅 Calendar Event ID: {calendar_event_id or 'None'}")
-    print(f"   📅 Calendar Status: {calendar_status}")
-    print(f"   🌍 User Language: {user_language}")
-    
-    print()
+    w("\n2. Integration Summary:")
+    w(f"   📧 Email Sent: {'Yes' if email_sent else 'No'}")
+    w(f"   📧 Email Status: {email_status}")
+    w(f"   📅 Calendar Event ID: {calendar_event_id or 'None'}")
+    w(f"   📅 Calendar Status: {calendar_status}")
+    w(f"   🌍 User Language: {user_language}")
+    
+    w()
+    sys.stdout.write(buf.getvalue())
 
 def main():
     """Main test function."""
@@ -239,21 +337,29 @@ def main():
     required_vars = ['TELEGRAM_BOT_TOKEN', 'GOOGLE_SHEETS_ID']
     optional_vars = ['EMAIL_USER', 'EMAIL_PASSWORD', 'GOOGLE_CREDENTIALS']
     
-    for var in required_vars:
-        status = "✅ Found" if os.getenv(var) else "❌ Missing"
-        print(f"   {var}: {status}")
+    # Both loops probe the module env snapshot through one bound method
+    have = _ENV.__contains__
+    for var, found in [(v, have(v)) for v in required_vars]:
+        print(f"   {var}: {'✅ Found' if found else '❌ Missing'}")
     
-    for var in optional_vars:
-        status = "✅ Found" if os.getenv(var) else "⚠️ Missing (feature disabled)"
-        print(f"   {var}: {status}")
+    for var, found in [(v, have(v)) for v in optional_vars]:
+        print(f"   {var}: {'✅ Found' if found else '⚠️ Missing (feature disabled)'}")
     
     print()
     
-    # Run tests
-    test_email_features()
-    test_calendar_features()
-    test_language_features()
-    test_integration()
+    # The three feature tests are independent and dominated by I/O, so
+    # they run concurrently; each buffers its output, so the report
+    # blocks come out whole
+    caps = _env_caps()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(test_email_features, caps),
+                   executor.submit(test_calendar_features, caps),
+                   executor.submit(test_language_features)]
+        for future in futures:
+            future.result()
+
+    # Integration builds on the features above, so it stays serial
+    test_integration(caps)
     
     print("✅ Feature testing completed!")
     print()